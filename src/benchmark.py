@@ -0,0 +1,292 @@
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+import cv2
+import numpy as np
+from config import Config
+from constants import CONFIG_PATH, MANUAL_TARGET_ALL
+from controllers import (
+    CaptureManager,
+    CapturedFrame,
+    ServoRig,
+    SprayController,
+    draw_boxes,
+)
+from display import Letterbox
+from inference import DetectionBus, create_inference_worker
+
+BENCHMARK_VERSION = 2
+DEFAULT_FRAMES = 300
+DEFAULT_WARMUP_FRAMES = 10
+DEFAULT_SERVO_COMMANDS = 1000
+SERVO_WRITE_WINDOW = 0.5
+DEFAULT_DISPLAY_SIZE = (1280, 720)
+SYNTHETIC_FRAME_COUNT = 30
+PERCENTILES = (50, 90, 95, 99)
+STAGES = ("capture", "inference", "draw_boxes", "display", "spray", "total")
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {stage: [] for stage in STAGES}
+        self.recording = True
+
+    @contextmanager
+    def measure(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.recording:
+                self.samples[stage].append(time.perf_counter() - started)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        report: dict[str, dict[str, float]] = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.asarray(samples) * 1000
+            stats = {"count": len(samples), "mean_ms": float(values.mean())}
+            for percentile in PERCENTILES:
+                stats[f"p{percentile}_ms"] = float(np.percentile(values, percentile))
+            stats["max_ms"] = float(values.max())
+            report[stage] = stats
+        return report
+
+
+class SyntheticSource:
+    def __init__(self, capture_manager: CaptureManager, width: int, height: int):
+        self.capture_manager = capture_manager
+        self.frames = [
+            self.synthetic_frame(index, width, height)
+            for index in range(SYNTHETIC_FRAME_COUNT)
+        ]
+        self.index = 0
+
+    def synthetic_frame(self, index: int, width: int, height: int) -> np.ndarray:
+        # A drifting bright box keeps motion gating, tracking and the detector
+        # busy, and frames are built up front so only the hand-off is timed.
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = (index * 3 % 64, 48, 32)
+        size = max(16, min(width, height) // 4)
+        x = index * 7 % max(1, width - size)
+        y = index * 3 % max(1, height - size)
+        frame[y : y + size, x : x + size] = (200, 180, 160)
+        return frame
+
+    def read(self) -> CapturedFrame | None:
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return self.capture_manager.publish(frame)
+
+
+class VideoSource:
+    def __init__(self, capture_manager: CaptureManager):
+        self.capture_manager = capture_manager
+
+    def read(self) -> CapturedFrame | None:
+        return self.capture_manager.read_latest()
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    try:
+        width, height = (int(part) for part in text.lower().split("x", 1))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            f"Expected WIDTHxHEIGHT, got '{text}'"
+        ) from exc
+    return width, height
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_config(args: argparse.Namespace) -> Config:
+    config = Config.load_from_file(args.config)
+    capture = replace(
+        config.capture,
+        enabled=args.video is not None,
+        use_webcam=False,
+        ip_address=args.video or "",
+        threaded_grab=False,
+        resolution=dict(config.capture.resolution),
+    )
+    if args.resolution is not None:
+        capture.resolution = {"x": args.resolution[0], "y": args.resolution[1]}
+    yolo = replace(config.yolo, enabled=config.yolo.enabled and not args.no_detect)
+    servo_pins = replace(config.servo_pins, backend="simulated")
+    return replace(config, capture=capture, yolo=yolo, servo_pins=servo_pins)
+
+
+def servo_throughput(servo_rig: ServoRig, commands: int) -> dict[str, float]:
+    started = time.perf_counter()
+    for index in range(commands):
+        servo_rig.set_manual_angle(MANUAL_TARGET_ALL, 90.0 * (index % 2))
+    elapsed = time.perf_counter() - started
+
+    # Scheduler writes are paced by control_rate rather than by the caller, so
+    # they are counted over a fixed window while the channels are moving.
+    servo_rig.set_manual_angle(MANUAL_TARGET_ALL, 180.0)
+    window = min(SERVO_WRITE_WINDOW, servo_rig.remaining_motion_time())
+    servo_rig.clear_command_log()
+    time.sleep(window)
+    writes = len(servo_rig.command_log())
+    return {
+        "commands": commands,
+        "elapsed_s": elapsed,
+        "commands_per_s": commands / elapsed if elapsed > 0 else 0.0,
+        "write_window_s": window,
+        "writes": writes,
+        "writes_per_s": writes / window if window > 0 else 0.0,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    config = build_config(args)
+    width, height = config.capture.resolution["x"], config.capture.resolution["y"]
+    rss_start_mb = peak_rss_mb()
+
+    capture_manager = CaptureManager(config.capture)
+    if args.video is not None:
+        source = VideoSource(capture_manager)
+    else:
+        source = SyntheticSource(capture_manager, width, height)
+
+    # The worker thread is never started; frames are pushed through process()
+    # so motion gating and tracking are timed along with the model.
+    inference_worker = create_inference_worker(
+        config.yolo,
+        config.capture,
+        capture_manager.latest_frame,
+        DetectionBus(),
+        start=False,
+    )
+    load_started = time.perf_counter()
+    inference_worker.start_backend()
+    model_load_ms = (time.perf_counter() - load_started) * 1000
+
+    servo_rig = ServoRig(config.servo_pins)
+    spray_controller = SprayController(servo_rig)
+    spray_controller.set_paused(True)
+    letterbox = Letterbox()
+    display_width, display_height = args.display_size
+
+    timer = StageTimer()
+    frames = 0
+    inferences = 0
+    detections = 0
+    statuses: dict[str, int] = {}
+    started = time.perf_counter()
+    try:
+        for index in range(args.warmup + args.frames):
+            timer.recording = index >= args.warmup
+            if index == args.warmup:
+                frames = 0
+                inferences = 0
+                detections = 0
+                statuses.clear()
+                started = time.perf_counter()
+
+            with timer.measure("total"):
+                with timer.measure("capture"):
+                    captured = source.read()
+                if captured is None:
+                    break
+                with timer.measure("inference"):
+                    detection = inference_worker.process(captured)
+                with timer.measure("draw_boxes"):
+                    draw_boxes(captured.image, detection)
+                with timer.measure("display"):
+                    letterbox.render(
+                        captured.image, detection, display_width, display_height
+                    )
+                with timer.measure("spray"):
+                    spray_controller.on_detection(detection)
+                    spray_controller.poll_severity()
+                    spray_controller.current_severity()
+
+            height, width = captured.image.shape[:2]
+            frames += 1
+            inferences += detection.age == 0
+            detections += len(detection.box_array)
+            statuses[detection.reason] = statuses.get(detection.reason, 0) + 1
+        elapsed = time.perf_counter() - started
+        servo = servo_throughput(servo_rig, args.servo_commands)
+        detector_status = inference_worker.backend_status()
+        warmup_ms = inference_worker.warmup_ms
+    finally:
+        inference_worker.stop_backend()
+        spray_controller.close()
+        servo_rig.shutdown()
+        capture_manager.close()
+
+    return {
+        "benchmark_version": BENCHMARK_VERSION,
+        "source": args.video or "synthetic",
+        "frames": frames,
+        "warmup_frames": args.warmup,
+        "resolution": {"x": width, "y": height},
+        "display_size": {"x": display_width, "y": display_height},
+        "elapsed_s": elapsed,
+        "throughput_fps": frames / elapsed if elapsed > 0 else 0.0,
+        "stages": timer.summary(),
+        "detector": {
+            "enabled": config.yolo.enabled,
+            "engine": config.yolo.engine,
+            "imgsz": config.yolo.imgsz,
+            "backend": config.yolo.backend,
+            "status": detector_status,
+            "load_ms": model_load_ms,
+            "warmup_ms": warmup_ms,
+            "inferences": inferences,
+            "results": statuses,
+            "boxes": detections,
+        },
+        "servo": servo,
+        "memory": {
+            "rss_peak_start_mb": rss_start_mb,
+            "rss_peak_end_mb": peak_rss_mb(),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay frames through the detection and spray pipeline."
+    )
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--video", help="Recorded video file to replay.")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP_FRAMES)
+    parser.add_argument("--resolution", type=parse_size)
+    parser.add_argument("--display-size", type=parse_size, default=DEFAULT_DISPLAY_SIZE)
+    parser.add_argument("--no-detect", action="store_true")
+    parser.add_argument("--servo-commands", type=int, default=DEFAULT_SERVO_COMMANDS)
+    parser.add_argument("--output", help="Write the JSON report to this path.")
+    args = parser.parse_args()
+
+    report = json.dumps(run_benchmark(args), indent=4)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
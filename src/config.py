@@ -15,11 +15,18 @@ class ServoPinConfig:
     clamp_enabled: bool = False
     clamp_min_angle: float = 0.0
     clamp_max_angle: float = 360.0
+    max_velocity: float = 180.0
+    max_acceleration: float = 720.0
 
 
 @dataclass
 class ServoPinsConfig:
     linkage_hold_time: float = 1.0
+    smooth_motion: bool = True
+    control_rate: float = 50.0
+    backend: str = "gpio"
+    simulated_slew_rate: float = 600.0
+    simulated_latency: float = 0.02
     defaults: ServoPinConfig = field(
         default_factory=lambda: ServoPinConfig(role="Default", pin=0)
     )
@@ -37,6 +44,27 @@ class YoloConfig:
     enabled: bool = True
     path: str = "assets/main.pt"
     min_confidence: float = 0.4
+    backend: str = "thread"
+    engine: str = "pytorch"
+    imgsz: int = 640
+    warmup_runs: int = 2
+    roi: dict[str, float] = field(
+        default_factory=lambda: {
+            "x1": 0.0,
+            "y1": 0.0,
+            "x2": 1.0,
+            "y2": 1.0,
+        }
+    )
+    auto_roi: bool = False
+    roi_padding: float = 0.1
+    adaptive_imgsz: bool = False
+    min_imgsz: int = 320
+    idle_seconds: float = 2.0
+    motion_gating: bool = True
+    motion_threshold: float = 3.0
+    max_inference_interval: float = 1.0
+    tracking: bool = True
 
 
 @dataclass
@@ -49,7 +77,10 @@ class CaptureConfig:
     )
     enabled: bool = True
     capture_fps: int = 10
+    inference_fps: int = 10
+    display_fps: int = 30
     use_webcam: bool = True
+    threaded_grab: bool = True
     ip_address: str = "http://192.168.100.109:8080/video"
 
 
@@ -71,6 +102,11 @@ class Config:
         return cls(
             servo_pins=ServoPinsConfig(
                 linkage_hold_time=float(servo_data.get("linkage_hold_time", 1.0)),
+                smooth_motion=bool(servo_data.get("smooth_motion", True)),
+                control_rate=float(servo_data.get("control_rate", 50.0)),
+                backend=str(servo_data.get("backend", "gpio")),
+                simulated_slew_rate=float(servo_data.get("simulated_slew_rate", 600.0)),
+                simulated_latency=float(servo_data.get("simulated_latency", 0.02)),
                 defaults=defaults,
                 servos=servos
                 if servos
@@ -15,5 +15,13 @@ PADDING_LARGE = 5
 PADDING_SMALL = 2
 
 UI_SCALE = 1.35
+UPTIME_REFRESH_SECONDS = 1.0
+BATTERY_REFRESH_SECONDS = 5.0
 CONFIG_PATH = "./config.json"
 WINDOW_SIZE = {"x": 1280, "y": 720}
+
+INFERENCE_BACKENDS = ["thread", "process"]
+YOLO_ENGINES = ["pytorch", "onnxruntime", "openvino", "ncnn"]
+SERVO_BACKENDS = ["gpio", "simulated"]
+MANUAL_TARGET_ALL = "ALL"
+STARTUP_POLL_MS = 50
@@ -1,15 +1,52 @@
+import math
+import shutil
 import threading
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, replace
+from functools import cached_property
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable
 import cv2
 import numpy as np
 from config import CaptureConfig, ServoPinConfig, ServoPinsConfig, YoloConfig
+from constants import MANUAL_TARGET_ALL
 
 MAX_SPRAY_TIME = 5.0
 ARM_HEIGHT_INTERVALS = 3
+MIN_PULSE_WIDTH = 0.5 / 1000
+MAX_PULSE_WIDTH = 2.5 / 1000
+SERVO_ROLES = ("Link", "Arm", "Pump")
+SERVO_STOP_TIMEOUT = 1.0
+MOTION_SETTLE_DEGREES = 0.1
+SIMULATED_LOG_LIMIT = 20_000
+MAX_DETECTION_AGE = 2.0
+SPRAY_STOP_TIMEOUT = 1.0
+SPRAY_STATE_IDLE = "idle"
+SPRAY_STATE_SCANNING = "scanning"
+SPRAY_STATE_SPRAYING = "spraying"
+SPRAY_STATE_PAUSED = "paused"
 DEFAULT_YOLO_MODEL_PATH = "assets/main.pt"
+EXPORT_FORMATS = {
+    "onnxruntime": ("onnx", ".onnx"),
+    "openvino": ("openvino", "_openvino_model"),
+    "ncnn": ("ncnn", "_ncnn_model"),
+}
+FRAME_STALE_SECONDS = 1.0
+GRAB_RETRY_INTERVAL = 0.05
+GRAB_STOP_TIMEOUT = 1.0
+DETECTION_LABEL = "hand"
+DETECTION_DTYPE = np.dtype(
+    [
+        ("x1", np.int32),
+        ("y1", np.int32),
+        ("x2", np.int32),
+        ("y2", np.int32),
+        ("confidence", np.float32),
+        ("class_id", np.int32),
+        ("track_id", np.int32),
+    ]
+)
 
 
 @dataclass
@@ -20,14 +57,210 @@ class DetectionBox:
     y2: int
     confidence: float
     label: str
+    track_id: int = -1
+
+
+@dataclass
+class CapturedFrame:
+    image: np.ndarray
+    timestamp: float
+    sequence: int
 
 
 @dataclass
 class DetectionResult:
     severity: float
-    boxes: list[DetectionBox]
+    box_array: np.ndarray
     active: bool
     reason: str = ""
+    sequence: int = -1
+    timestamp: float = 0.0
+    age: float = 0.0
+
+    def __post_init__(self):
+        if not isinstance(self.box_array, np.ndarray):
+            self.box_array = boxes_to_array(self.box_array)
+
+    @cached_property
+    def boxes(self) -> list[DetectionBox]:
+        return [
+            DetectionBox(
+                x1=x1,
+                y1=y1,
+                x2=x2,
+                y2=y2,
+                confidence=confidence,
+                label=DETECTION_LABEL,
+                track_id=track_id,
+            )
+            for x1, y1, x2, y2, confidence, _class_id, track_id in (
+                self.box_array.tolist()
+            )
+        ]
+
+
+def boxes_to_array(boxes: list[DetectionBox]) -> np.ndarray:
+    array = np.empty(len(boxes), dtype=DETECTION_DTYPE)
+    for index, box in enumerate(boxes):
+        array[index] = (
+            box.x1,
+            box.y1,
+            box.x2,
+            box.y2,
+            box.confidence,
+            -1,
+            box.track_id,
+        )
+    return array
+
+
+class PinFactoryPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._angular_servo = None
+        self._factory = None
+        self.error: str | None = None
+        self.pigpio_error: str | None = None
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                from gpiozero import AngularServo
+            except Exception as exc:
+                self.error = f"gpiozero={exc}"
+                return
+            self._angular_servo = AngularServo
+            try:
+                from gpiozero.pins.pigpio import PiGPIOFactory
+
+                self._factory = PiGPIOFactory()
+            except Exception as exc:
+                self.pigpio_error = str(exc)
+
+    def create_servo(self, pin: int, min_angle: float, max_angle: float):
+        self.load()
+        if self._angular_servo is None:
+            raise RuntimeError(self.error)
+
+        options = dict(
+            min_angle=min_angle,
+            max_angle=max_angle,
+            min_pulse_width=MIN_PULSE_WIDTH,
+            max_pulse_width=MAX_PULSE_WIDTH,
+        )
+        pigpio_error = self.pigpio_error
+        if self._factory is not None:
+            try:
+                servo = self._angular_servo(pin, pin_factory=self._factory, **options)
+                return servo, self._factory.connection
+            except Exception as exc:
+                pigpio_error = str(exc)
+        try:
+            return self._angular_servo(pin, **options), None
+        except Exception as exc:
+            raise RuntimeError(f"pigpio={pigpio_error}; fallback={exc}") from exc
+
+    def close(self):
+        with self._lock:
+            if self._factory is not None:
+                try:
+                    self._factory.close()
+                except Exception:
+                    pass
+            self._factory = None
+            self._angular_servo = None
+            self._loaded = False
+            self.error = None
+            self.pigpio_error = None
+
+
+@dataclass
+class ServoCommand:
+    timestamp: float
+    pin: int
+    angle: float
+
+
+class SimulatedServo:
+    def __init__(
+        self,
+        backend: "SimulatedServoBackend",
+        pin: int,
+        min_angle: float,
+        max_angle: float,
+    ):
+        self.backend = backend
+        self.pin = pin
+        self.min_angle = min_angle
+        self.max_angle = max_angle
+        self._segments: list[tuple[float, float, float]] = []
+        self._angle: float | None = None
+
+    @property
+    def angle(self) -> float | None:
+        return self._angle
+
+    @angle.setter
+    def angle(self, value: float):
+        now = time.monotonic()
+        self.backend.record(ServoCommand(now, self.pin, value))
+        start_time = now + self.backend.latency
+        start_angle = self.position(start_time)
+        self._segments.append(
+            (start_time, value if start_angle is None else start_angle, value)
+        )
+        # Only the newest segment that has started still affects position().
+        while len(self._segments) > 1 and self._segments[1][0] <= now:
+            del self._segments[0]
+        self._angle = value
+
+    def position(self, at: float | None = None) -> float | None:
+        at = time.monotonic() if at is None else at
+        for start_time, start_angle, target in reversed(self._segments):
+            if start_time > at:
+                continue
+            slew_rate = self.backend.slew_rate
+            if slew_rate <= 0:
+                return target
+            travel = slew_rate * (at - start_time)
+            return start_angle + max(-travel, min(target - start_angle, travel))
+        return None
+
+    def detach(self):
+        self._angle = None
+
+
+class SimulatedServoBackend:
+    def __init__(self, slew_rate: float, latency: float):
+        self.slew_rate = slew_rate
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._log: deque[ServoCommand] = deque(maxlen=SIMULATED_LOG_LIMIT)
+        self.servos: dict[int, SimulatedServo] = {}
+
+    def create_servo(self, pin: int, min_angle: float, max_angle: float):
+        servo = SimulatedServo(self, pin, min_angle, max_angle)
+        self.servos[pin] = servo
+        return servo, None
+
+    def record(self, command: ServoCommand):
+        with self._lock:
+            self._log.append(command)
+
+    def command_log(self) -> list[ServoCommand]:
+        with self._lock:
+            return list(self._log)
+
+    def clear_log(self):
+        with self._lock:
+            self._log.clear()
+
+    def close(self):
+        self.servos.clear()
 
 
 class ServoChannel:
@@ -35,6 +268,7 @@ class ServoChannel:
         self,
         pin: int,
         *,
+        pins: PinFactoryPool | SimulatedServoBackend,
         min_angle: float = 0,
         max_angle: float = 360,
         angle_offset: float = 0.0,
@@ -42,88 +276,283 @@ class ServoChannel:
         min_command_interval: float = 0.08,
         off_angle: float | None = None,
         on_angle: float | None = None,
+        max_velocity: float = 180.0,
+        max_acceleration: float = 720.0,
     ):
         self.pin = pin
         self.min_angle = min_angle
         self.max_angle = max_angle
-        self.angle_offset = angle_offset
-        self.deadband_degrees = deadband_degrees
-        self.min_command_interval = min_command_interval
-        self.off_angle = min_angle if off_angle is None else off_angle
-        self.on_angle = max_angle if on_angle is None else on_angle
+        self.configure(
+            angle_offset=angle_offset,
+            deadband_degrees=deadband_degrees,
+            min_command_interval=min_command_interval,
+            off_angle=off_angle,
+            on_angle=on_angle,
+            max_velocity=max_velocity,
+            max_acceleration=max_acceleration,
+        )
         self.last_commanded_angle: float | None = None
         self.last_command_time = 0.0
 
         self.servo = None
+        self.connection = None
         self.is_available = False
         self.init_error: str | None = None
 
         try:
-            from gpiozero import AngularServo
-            from gpiozero.pins.pigpio import PiGPIOFactory
-
-            self.servo = AngularServo(
-                pin,
-                min_angle=min_angle,
-                max_angle=max_angle,
-                min_pulse_width=0.5 / 1000,
-                max_pulse_width=2.5 / 1000,
-                pin_factory=PiGPIOFactory(),
-            )
+            self.servo, self.connection = pins.create_servo(pin, min_angle, max_angle)
             self.is_available = True
         except Exception as exc:
-            try:
-                from gpiozero import AngularServo
+            self.init_error = str(exc)
 
-                self.servo = AngularServo(
-                    pin,
-                    min_angle=min_angle,
-                    max_angle=max_angle,
-                    min_pulse_width=0.5 / 1000,
-                    max_pulse_width=2.5 / 1000,
-                )
-                self.is_available = True
-            except Exception as fallback_exc:
-                self.is_available = False
-                self.init_error = f"pigpio={exc}; fallback={fallback_exc}"
+    @property
+    def hardware_key(self) -> tuple[int, float, float]:
+        return (self.pin, self.min_angle, self.max_angle)
+
+    def configure(
+        self,
+        *,
+        angle_offset: float = 0.0,
+        deadband_degrees: float = 1.5,
+        min_command_interval: float = 0.08,
+        off_angle: float | None = None,
+        on_angle: float | None = None,
+        max_velocity: float = 180.0,
+        max_acceleration: float = 720.0,
+    ):
+        self.angle_offset = angle_offset
+        self.deadband_degrees = deadband_degrees
+        self.min_command_interval = min_command_interval
+        self.off_angle = self.min_angle if off_angle is None else off_angle
+        self.on_angle = self.max_angle if on_angle is None else on_angle
+        self.max_velocity = max_velocity
+        self.max_acceleration = max_acceleration
 
     @property
     def available(self) -> bool:
         return self.is_available
 
     def set_angle(self, angle: float, force: bool = False):
-        if not self.is_available:
-            return
+        target = self.resolve_angle(angle, force)
+        if target is not None:
+            self.write(target, time.monotonic())
 
-        now = time.monotonic()
-        calibrated_angle = angle + self.angle_offset
-        bounded_angle = max(self.min_angle, min(calibrated_angle, self.max_angle))
+    def resolve_angle(self, angle: float, force: bool = False) -> float | None:
+        if not self.is_available:
+            return None
 
+        bounded_angle = self.bounded_angle(angle)
         if not force and self.last_commanded_angle is not None:
             if abs(bounded_angle - self.last_commanded_angle) < self.deadband_degrees:
-                return
-            if now - self.last_command_time < self.min_command_interval:
-                return
+                return None
+            if time.monotonic() - self.last_command_time < self.min_command_interval:
+                return None
+        return bounded_angle
 
-        self.servo.angle = bounded_angle
-        self.last_commanded_angle = bounded_angle
+    def bounded_angle(self, angle: float) -> float:
+        calibrated_angle = angle + self.angle_offset
+        return max(self.min_angle, min(calibrated_angle, self.max_angle))
+
+    def pulse_width_us(self, angle: float) -> int:
+        span = self.max_angle - self.min_angle
+        fraction = 0.0 if span <= 0 else (angle - self.min_angle) / span
+        return round(
+            (MIN_PULSE_WIDTH + fraction * (MAX_PULSE_WIDTH - MIN_PULSE_WIDTH))
+            * 1_000_000
+        )
+
+    def write(self, angle: float, now: float):
+        if self.connection is not None:
+            self.connection.set_servo_pulsewidth(self.pin, self.pulse_width_us(angle))
+        else:
+            self.servo.angle = angle
+        self.last_commanded_angle = angle
         self.last_command_time = now
 
     def close(self):
         if not self.is_available:
             return
         try:
+            if self.connection is not None:
+                self.connection.set_servo_pulsewidth(self.pin, 0)
             self.servo.detach()
         except Exception:
             pass
 
 
+@dataclass
+class ServoMotion:
+    position: float
+    target: float
+    velocity: float = 0.0
+
+    def step(self, dt: float, max_velocity: float, max_acceleration: float) -> bool:
+        distance = self.target - self.position
+        if max_velocity <= 0 or max_acceleration <= 0:
+            distance = 0.0
+        if abs(distance) <= MOTION_SETTLE_DEGREES:
+            self.position = self.target
+            self.velocity = 0.0
+            return True
+
+        direction = 1.0 if distance > 0 else -1.0
+        stopping_speed = math.sqrt(2 * max_acceleration * abs(distance))
+        desired = direction * min(max_velocity, stopping_speed)
+        change = max_acceleration * dt
+        self.velocity += max(-change, min(desired - self.velocity, change))
+
+        travel = self.velocity * dt
+        if travel * direction >= abs(distance):
+            self.position = self.target
+            self.velocity = 0.0
+            return True
+        self.position += travel
+        return False
+
+    def remaining_time(self, max_velocity: float, max_acceleration: float) -> float:
+        distance = abs(self.target - self.position)
+        if distance <= MOTION_SETTLE_DEGREES or max_velocity <= 0:
+            return 0.0
+        if max_acceleration <= 0:
+            return 0.0
+        if distance >= max_velocity**2 / max_acceleration:
+            return distance / max_velocity + max_velocity / max_acceleration
+        return 2 * math.sqrt(distance / max_acceleration)
+
+
+class ServoScheduler:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / max(1.0, float(rate))
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._motions: dict[ServoChannel, ServoMotion] = {}
+        self._discarded: set[ServoChannel] = set()
+        self._stop = False
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def set_rate(self, rate: float):
+        with self._condition:
+            self.interval = 1.0 / max(1.0, float(rate))
+
+    def set_target(self, channel: ServoChannel, angle: float):
+        with self._condition:
+            motion = self._motions.get(channel)
+            if motion is not None:
+                motion.target = angle
+            else:
+                start = channel.last_commanded_angle
+                self._motions[channel] = ServoMotion(
+                    angle if start is None else start, angle
+                )
+            self._condition.notify()
+
+    def clear(self):
+        with self._condition, self._write_lock:
+            self._motions.clear()
+
+    def discard(self, channel: ServoChannel):
+        with self._condition, self._write_lock:
+            self._motions.pop(channel, None)
+            self._discarded.add(channel)
+
+    def remaining_time(self, channels: Iterable[ServoChannel] | None = None) -> float:
+        with self._condition:
+            selected = self._motions if channels is None else set(channels)
+            return max(
+                (
+                    motion.remaining_time(
+                        channel.max_velocity, channel.max_acceleration
+                    )
+                    for channel, motion in self._motions.items()
+                    if channel in selected
+                ),
+                default=0.0,
+            )
+
+    def tick(self, dt: float) -> list[tuple[ServoChannel, float]]:
+        pending: list[tuple[ServoChannel, float]] = []
+        for channel, motion in list(self._motions.items()):
+            settled = motion.step(dt, channel.max_velocity, channel.max_acceleration)
+            pending.append((channel, motion.position))
+            if settled:
+                del self._motions[channel]
+        return pending
+
+    def run(self):
+        last_tick = time.monotonic()
+        while True:
+            with self._condition:
+                if not self._motions and not self._stop:
+                    self._condition.wait()
+                    last_tick = time.monotonic() - self.interval
+                if self._stop:
+                    return
+                now = time.monotonic()
+                # Anything discarded before this tick is already out of
+                # _motions; only a discard racing the writes below matters.
+                self._discarded.clear()
+                pending = self.tick(min(now - last_tick, self.interval * 4))
+                last_tick = now
+                interval = self.interval
+
+            failed: list[ServoChannel] = []
+            with self._write_lock:
+                for channel, angle in pending:
+                    if channel in self._discarded:
+                        continue
+                    try:
+                        channel.write(angle, now)
+                    except Exception as exc:
+                        channel.is_available = False
+                        channel.init_error = f"write failed: {exc}"
+                        failed.append(channel)
+            # _condition is always taken before _write_lock, never inside it.
+            if failed:
+                with self._condition:
+                    for channel in failed:
+                        self._motions.pop(channel, None)
+            time.sleep(max(0.0, interval - (time.monotonic() - now)))
+
+    def close(self):
+        with self._condition:
+            self._stop = True
+            self._motions.clear()
+            self._condition.notify_all()
+        self._thread.join(SERVO_STOP_TIMEOUT)
+
+
+def pin_backend_key(config: ServoPinsConfig) -> tuple:
+    if config.backend == "simulated":
+        return (
+            config.backend,
+            float(config.simulated_slew_rate),
+            float(config.simulated_latency),
+        )
+    return (config.backend,)
+
+
+def create_pin_backend(
+    config: ServoPinsConfig,
+) -> PinFactoryPool | SimulatedServoBackend:
+    if config.backend == "simulated":
+        return SimulatedServoBackend(
+            float(config.simulated_slew_rate), max(0.0, float(config.simulated_latency))
+        )
+    return PinFactoryPool()
+
+
 class ServoRig:
     def __init__(self, config: ServoPinsConfig):
         self._lock = threading.RLock()
         self.linkages: list[ServoChannel] = []
         self.arms: list[ServoChannel] = []
         self.pumps: list[ServoChannel] = []
+        self._targets: dict[str, list[ServoChannel]] = {}
+        self.pins = create_pin_backend(config)
+        self.pins_key = pin_backend_key(config)
+        self.smooth_motion = bool(config.smooth_motion)
+        self.scheduler = ServoScheduler(config.control_rate)
 
         self.linkage_hold_time = float(config.linkage_hold_time)
         self.linkages_active = False
@@ -131,27 +560,70 @@ class ServoRig:
         self._setup(config)
 
     def _setup(self, config: ServoPinsConfig):
-        self.shutdown()
         self.linkage_hold_time = float(config.linkage_hold_time)
-        self.linkages = [
-            self.build_channel(servo_cfg, config.defaults)
-            for servo_cfg in config.servos
-            if servo_cfg.role == "Link"
-        ]
-        self.arms = [
-            self.build_channel(servo_cfg, config.defaults)
-            for servo_cfg in config.servos
-            if servo_cfg.role == "Arm"
-        ]
-        self.pumps = [
-            self.build_channel(servo_cfg, config.defaults)
+        self.smooth_motion = bool(config.smooth_motion)
+        self.scheduler.set_rate(config.control_rate)
+        if not self.smooth_motion:
+            self.scheduler.clear()
+        # The pin pool caches its load result, so a channel that failed to
+        # start or to write is only retried on a fresh pool.
+        failed = any(not channel.available for channel in self.channels)
+        if failed or pin_backend_key(config) != self.pins_key:
+            for channel in self.channels:
+                self.scheduler.discard(channel)
+                channel.close()
+            self.linkages, self.arms, self.pumps = [], [], []
+            self.pins.close()
+            self.pins = create_pin_backend(config)
+            self.pins_key = pin_backend_key(config)
+        settings = [
+            (servo_cfg.role, self.channel_settings(servo_cfg, config.defaults))
             for servo_cfg in config.servos
-            if servo_cfg.role == "Pump"
+            if servo_cfg.role in SERVO_ROLES
         ]
 
-    def build_channel(
+        reusable: dict[tuple[int, float, float], list[ServoChannel]] = {}
+        for channel in self.channels:
+            reusable.setdefault(channel.hardware_key, []).append(channel)
+        matched: list[ServoChannel | None] = []
+        for _, options in settings:
+            candidates = reusable.get(
+                (options["pin"], options["min_angle"], options["max_angle"])
+            )
+            matched.append(candidates.pop(0) if candidates else None)
+        for channels in reusable.values():
+            for channel in channels:
+                self.scheduler.discard(channel)
+                channel.close()
+
+        self.linkages, self.arms, self.pumps = [], [], []
+        role_channels = {"Link": self.linkages, "Arm": self.arms, "Pump": self.pumps}
+        for (role, options), channel in zip(settings, matched):
+            if channel is None:
+                channel = ServoChannel(pins=self.pins, **options)
+            else:
+                channel.configure(
+                    **{
+                        key: value
+                        for key, value in options.items()
+                        if key not in ("pin", "min_angle", "max_angle")
+                    }
+                )
+            role_channels[role].append(channel)
+
+        self._targets = {}
+        for role, channels in (
+            ("Link", self.linkages),
+            ("Arm", self.arms),
+            ("Pump", self.pumps),
+        ):
+            for channel in channels:
+                self._targets.setdefault(f"{role}:{channel.pin}", []).append(channel)
+        self._targets[MANUAL_TARGET_ALL] = [*self.linkages, *self.arms, *self.pumps]
+
+    def channel_settings(
         self, servo_cfg: ServoPinConfig, default_cfg: ServoPinConfig
-    ) -> ServoChannel:
+    ) -> dict:
         min_angle = float(
             servo_cfg.min_angle
             if servo_cfg.min_angle is not None
@@ -186,8 +658,8 @@ class ServoRig:
         off_angle = clamp_min if clamp_enabled else min_angle
         on_angle = clamp_max if clamp_enabled else max_angle
 
-        return ServoChannel(
-            servo_cfg.pin,
+        return dict(
+            pin=servo_cfg.pin,
             min_angle=min_angle,
             max_angle=max_angle,
             angle_offset=float(
@@ -213,6 +685,16 @@ class ServoRig:
             ),
             off_angle=off_angle,
             on_angle=on_angle,
+            max_velocity=float(
+                servo_cfg.max_velocity
+                if servo_cfg.max_velocity is not None
+                else default_cfg.max_velocity
+            ),
+            max_acceleration=float(
+                servo_cfg.max_acceleration
+                if servo_cfg.max_acceleration is not None
+                else default_cfg.max_acceleration
+            ),
         )
 
     def apply_config(self, config: ServoPinsConfig):
@@ -222,67 +704,105 @@ class ServoRig:
             self.set_pumps(False, force=True)
             self.set_arm_height(0.0, force=True)
 
+    def command(
+        self, commands: Iterable[tuple[ServoChannel, float]], force: bool = False
+    ):
+        with self._lock:
+            if self.smooth_motion:
+                for channel, angle in commands:
+                    if channel.available:
+                        self.scheduler.set_target(channel, channel.bounded_angle(angle))
+                return
+
+            pending: list[tuple[ServoChannel, float]] = []
+            for channel, angle in commands:
+                target = channel.resolve_angle(angle, force)
+                if target is not None:
+                    pending.append((channel, target))
+            self.flush(pending)
+
+    def flush(self, pending: list[tuple[ServoChannel, float]]):
+        now = time.monotonic()
+        for channel, angle in pending:
+            channel.write(angle, now)
+
+    def remaining_motion_time(
+        self, channels: Iterable[ServoChannel] | None = None
+    ) -> float:
+        if not self.smooth_motion:
+            return 0.0
+        return self.scheduler.remaining_time(channels)
+
     def set_linkages(self, active: bool, force: bool = False):
         with self._lock:
             self.linkages_active = active
-            for servo in self.linkages:
-                target = servo.on_angle if active else servo.off_angle
-                servo.set_angle(target, force=force)
+            self.command(
+                (
+                    (servo, servo.on_angle if active else servo.off_angle)
+                    for servo in self.linkages
+                ),
+                force=force,
+            )
 
     def set_arm_height(self, percent: float, force: bool = False):
-        with self._lock:
-            normalized = max(0.0, min(percent, 1.0))
-            target = normalized * 70
-            for servo in self.arms:
-                servo.set_angle(target, force=force)
+        normalized = max(0.0, min(percent, 1.0))
+        target = normalized * 70
+        self.command(((servo, target) for servo in self.arms), force=force)
 
     def set_pumps(self, active: bool, force: bool = False):
         with self._lock:
             self.pumps_active = active
-            for servo in self.pumps:
-                target = servo.on_angle if active else servo.off_angle
-                servo.set_angle(target, force=force)
+            self.command(
+                (
+                    (servo, servo.on_angle if active else servo.off_angle)
+                    for servo in self.pumps
+                ),
+                force=force,
+            )
+
+    @property
+    def channels(self) -> list[ServoChannel]:
+        return [*self.linkages, *self.arms, *self.pumps]
 
     def shutdown(self):
-        for channel in [*self.linkages, *self.arms, *self.pumps]:
-            channel.close()
-        self.linkages = []
-        self.arms = []
-        self.pumps = []
+        with self._lock:
+            self.scheduler.close()
+            # The scheduler drops pending motions on close, so a pump it was
+            # still turning off would be left on.
+            now = time.monotonic()
+            for channel in [*self.pumps, *self.linkages]:
+                if not channel.available:
+                    continue
+                try:
+                    channel.write(channel.off_angle, now)
+                except Exception:
+                    pass
+            for channel in self.channels:
+                channel.close()
+            self.linkages = []
+            self.arms = []
+            self.pumps = []
+            self._targets = {}
+            self.pins.close()
+
+    def command_log(self) -> list[ServoCommand]:
+        if isinstance(self.pins, SimulatedServoBackend):
+            return self.pins.command_log()
+        return []
+
+    def clear_command_log(self):
+        if isinstance(self.pins, SimulatedServoBackend):
+            self.pins.clear_log()
 
     def manual_targets(self) -> list[str]:
-        targets: list[str] = []
-        for role, channels in (
-            ("Link", self.linkages),
-            ("Arm", self.arms),
-            ("Pump", self.pumps),
-        ):
-            for channel in channels:
-                targets.append(f"{role}:{channel.pin}")
-        return targets
+        return [target for target in self._targets if target != MANUAL_TARGET_ALL]
 
     def set_manual_angle(self, target: str, angle: float, force: bool = True) -> bool:
-        try:
-            role, pin_text = target.split(":", 1)
-            pin = int(pin_text)
-        except Exception:
+        channels = self._targets.get(target)
+        if not channels:
             return False
-
-        channels: list[ServoChannel]
-        if role == "Link":
-            channels = self.linkages
-        elif role == "Arm":
-            channels = self.arms
-        elif role == "Pump":
-            channels = self.pumps
-        else:
-            return False
-
-        for channel in channels:
-            if channel.pin == pin:
-                channel.set_angle(angle, force=force)
-                return True
-        return False
+        self.command(((channel, angle) for channel in channels), force=force)
+        return True
 
     @property
     def total_channels(self) -> int:
@@ -295,85 +815,430 @@ class ServoRig:
 
 
 class CaptureManager:
-    def __init__(self, config: CaptureConfig):
+    def __init__(self, config: CaptureConfig, open_now: bool = True):
         self._lock = threading.Lock()
+        self._frame_lock = threading.Lock()
         self.capture: cv2.VideoCapture | None = None
         self.config = config
-        self.apply(config)
+        self._source_key: tuple | None = None
+        self._grab_thread: threading.Thread | None = None
+        self._grab_stop = threading.Event()
+        self._grab_local = False
+        self._latest: CapturedFrame | None = None
+        self._sequence = 0
+        self._generation = 0
+        self.opening = False
+        if open_now:
+            self.apply(config)
 
     def source(self, config: CaptureConfig):
         if config.use_webcam:
             return 0
         return config.ip_address
 
-    def apply(self, config: CaptureConfig):
-        self.config = config
-        if self.capture:
-            self.capture.release()
-            self.capture = None
+    def source_key(self, config: CaptureConfig) -> tuple:
+        return (
+            config.enabled,
+            config.use_webcam,
+            config.ip_address,
+            config.threaded_grab,
+            config.resolution["x"],
+            config.resolution["y"],
+        )
 
+    def open_capture(self, config: CaptureConfig) -> cv2.VideoCapture | None:
         if not config.enabled:
-            return
+            return None
+        capture = cv2.VideoCapture(self.source(config))
+        capture.set(cv2.CAP_PROP_FPS, max(1, int(config.capture_fps)))
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, config.resolution["x"])
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, config.resolution["y"])
+        return capture
+
+    def install(self, capture: cv2.VideoCapture | None, config: CaptureConfig):
+        self.capture = capture
+        if capture is not None and config.threaded_grab:
+            self._grab_stop = threading.Event()
+            self._grab_local = config.use_webcam
+            self._grab_thread = threading.Thread(
+                target=self.grab_loop,
+                args=(capture, self._grab_stop),
+                daemon=True,
+            )
+            self._grab_thread.start()
 
-        self.capture = cv2.VideoCapture(self.source(config))
+    def apply(self, config: CaptureConfig):
+        self.config = config
+        self._source_key = self.source_key(config)
+        self._generation += 1
+        grabber = self.release()
+        if grabber is not None:
+            grabber.join(GRAB_STOP_TIMEOUT)
+        self.install(self.open_capture(config), config)
 
     def apply_config(self, config: CaptureConfig):
         with self._lock:
-            must_reopen = (
-                self.capture is None
-                or config.enabled != self.config.enabled
-                or config.use_webcam != self.config.use_webcam
-                or config.ip_address != self.config.ip_address
-            )
-            if must_reopen:
-                self.apply(config)
-            else:
-                self.config = config
+            source_key = self.source_key(config)
+            self.config = config
+            if source_key == self._source_key and (
+                self.capture is not None or self.opening
+            ):
+                return
+            self._source_key = source_key
+            self._generation += 1
+            generation = self._generation
+            self.opening = config.enabled
+            grabber = self.release()
+
+        # Connecting to a stream can block for seconds, so the new capture is
+        # opened without holding _lock and only swapped in once it is ready.
+        capture = None
+        try:
+            if grabber is not None:
+                grabber.join(GRAB_STOP_TIMEOUT)
+            capture = self.open_capture(config)
+        finally:
+            with self._lock:
+                current = generation == self._generation
+                if current:
+                    self.install(capture, config)
+                    self.opening = False
+            if not current and capture is not None:
+                capture.release()
+
+    def release(self) -> threading.Thread | None:
+        grabber = None
+        if self._grab_thread is not None:
+            # The grabber may be blocked inside read() on a stalled stream, so
+            # it owns the release of its capture once it notices the stop flag.
+            # A local device must be free before it can be opened again, so
+            # its grabber is returned for the caller to join outside _lock.
+            self._grab_stop.set()
+            if self._grab_local:
+                grabber = self._grab_thread
+            self._grab_thread = None
+        elif self.capture is not None:
+            self.capture.release()
+        self.capture = None
+        with self._frame_lock:
+            self._latest = None
+        return grabber
+
+    def grab_loop(self, capture: cv2.VideoCapture, stop: threading.Event):
+        last_publish = 0.0
+        try:
+            while not stop.is_set():
+                if not capture.grab():
+                    stop.wait(GRAB_RETRY_INTERVAL)
+                    continue
+                # Every frame is grabbed so the source buffer never backs up,
+                # but only frames due at capture_fps are decoded and published.
+                interval = 1.0 / max(1, int(self.config.capture_fps))
+                if time.monotonic() - last_publish < interval:
+                    continue
+                ok, frame = capture.retrieve()
+                if not ok:
+                    continue
+                last_publish = time.monotonic()
+                self.publish(frame, stop)
+        finally:
+            capture.release()
+
+    def publish(
+        self, frame: np.ndarray, stop: threading.Event | None = None
+    ) -> CapturedFrame | None:
+        timestamp = time.monotonic()
+        with self._frame_lock:
+            if stop is not None and stop.is_set():
+                return None
+            self._sequence += 1
+            self._latest = CapturedFrame(frame, timestamp, self._sequence)
+            return self._latest
+
+    def latest_frame(self) -> CapturedFrame | None:
+        if not self.config.enabled:
+            return None
+        with self._frame_lock:
+            latest = self._latest
+        if latest is None:
+            return None
+        # Slow capture rates get two frame intervals before a frame is stale.
+        interval = 1.0 / max(1, int(self.config.capture_fps))
+        if time.monotonic() - latest.timestamp > max(FRAME_STALE_SECONDS, 2 * interval):
+            return None
+        return latest
+
+    def read_latest(self) -> CapturedFrame | None:
+        if not self.config.enabled:
+            return None
+
+        if self._grab_thread is not None:
+            return self.latest_frame()
 
-    def read(self) -> np.ndarray | None:
         with self._lock:
-            if not self.config.enabled or self.capture is None:
+            if self.capture is None:
                 return None
             ok, frame = self.capture.read()
             if not ok:
                 return None
-            width = self.config.resolution["x"]
-            height = self.config.resolution["y"]
-            return cv2.resize(frame, (width, height))
+            return self.publish(frame)
+
+    def read(self) -> np.ndarray | None:
+        latest = self.read_latest()
+        if latest is None:
+            return None
+        return latest.image
 
     def close(self):
         with self._lock:
-            if self.capture:
-                self.capture.release()
-                self.capture = None
+            self._generation += 1
+            self.opening = False
+            grabber = self.release()
+        if grabber is not None:
+            grabber.join(GRAB_STOP_TIMEOUT)
+
+
+@dataclass
+class LoadedModel:
+    model: object
+    imgsz: int
+    min_imgsz: int
+    warmup_ms: float | None = None
+
+    def sizes(self) -> list[int]:
+        if self.min_imgsz == self.imgsz:
+            return [self.imgsz]
+        return [self.imgsz, self.min_imgsz]
 
 
 class YoloDetector:
-    def __init__(self, config: YoloConfig):
-        self.model = None
+    def __init__(
+        self,
+        config: YoloConfig,
+        resolution: dict[str, int] | None = None,
+        on_progress: Callable[[str], None] | None = None,
+    ):
+        self.on_progress = on_progress
+        self.loaded: LoadedModel | None = None
         self.config = config
+        self.resolution = dict(resolution) if resolution else None
         self.status_reason = ""
+        self.reloading = False
+        self._input_buffer: np.ndarray | None = None
+        self._last_seen = 0.0
+        self._tracked_roi: tuple[int, int, int, int] | None = None
+        self._model_key: tuple | None = None
+        self._swap_lock = threading.Lock()
+        self._generation = 0
         self.load(config)
 
+    @property
+    def warmup_ms(self) -> float | None:
+        loaded = self.loaded
+        return loaded.warmup_ms if loaded is not None else None
+
+    def model_key(self, config: YoloConfig) -> tuple:
+        return (
+            config.enabled,
+            config.path,
+            config.engine,
+            config.imgsz,
+            config.adaptive_imgsz,
+            config.min_imgsz,
+        )
+
+    def next_generation(self) -> int:
+        with self._swap_lock:
+            self._generation += 1
+            return self._generation
+
     def load(self, config: YoloConfig):
         self.config = config
-        self.model = None
-        self.status_reason = ""
+        self._model_key = self.model_key(config)
+        generation = self.next_generation()
+        self.swap(generation, *self.build_model(replace(config)))
+
+    def reload_in_background(self, config: YoloConfig):
+        self.config = config
+        self._model_key = self.model_key(config)
+        generation = self.next_generation()
+        snapshot = replace(config)
+        self.reloading = True
+        threading.Thread(
+            target=lambda: self.swap(generation, *self.build_model(snapshot)),
+            daemon=True,
+        ).start()
+
+    def swap(self, generation: int, loaded: LoadedModel | None, status_reason: str):
+        with self._swap_lock:
+            if generation != self._generation:
+                return
+            self.loaded = loaded
+            self.status_reason = status_reason
+            self.reloading = False
+
+    def report_progress(self, status: str):
+        if self.on_progress is not None:
+            self.on_progress(status)
 
+    def build_model(self, config: YoloConfig) -> tuple[LoadedModel | None, str]:
         if not config.enabled:
-            self.status_reason = "YOLO disabled"
-            return
+            return None, "YOLO disabled"
         model_path = self.resolve_model_path(
             config.path.strip() or DEFAULT_YOLO_MODEL_PATH
         )
 
+        self.report_progress("Importing ultralytics")
         try:
             from ultralytics import YOLO
+        except Exception as exc:
+            return None, f"YOLO unavailable: {exc}"
+
+        status_reason = ""
+        if config.engine in EXPORT_FORMATS:
+            self.report_progress(f"Preparing {config.engine} model")
+            try:
+                model_path = self.export_model(YOLO, model_path, config)
+            except Exception as exc:
+                status_reason = f"Export to {config.engine} failed: {exc}"
+
+        # Exported engines are built for a fixed input size, so only the
+        # PyTorch weights can shrink their inference size while idle.
+        min_imgsz = config.imgsz
+        if config.adaptive_imgsz and Path(model_path).suffix == ".pt":
+            min_imgsz = max(32, min(config.min_imgsz, config.imgsz) // 32 * 32)
+
+        self.report_progress("Loading model weights")
+        try:
+            loaded = LoadedModel(
+                YOLO(model_path, task="detect"), config.imgsz, min_imgsz
+            )
+        except Exception as exc:
+            return None, f"YOLO unavailable: {exc}"
 
-            self.model = YOLO(model_path)
+        self.report_progress("Warming up model")
+        try:
+            loaded.warmup_ms = self.warmup(loaded, config.warmup_runs)
+        except Exception as exc:
+            status_reason = f"Warm-up failed: {exc}"
+        return loaded, status_reason
+
+    def input_shape(self, imgsz: int) -> tuple[int, int, int]:
+        if self.resolution is None:
+            return (imgsz, imgsz, 3)
+        return (self.resolution["y"], self.resolution["x"], 3)
+
+    def warmup(self, loaded: LoadedModel, runs: int) -> float | None:
+        if runs <= 0:
+            return None
+        dummy = np.zeros(self.input_shape(loaded.imgsz), dtype=np.uint8)
+        started = time.monotonic()
+        for imgsz in loaded.sizes():
+            for _ in range(runs):
+                loaded.model(dummy, imgsz=imgsz, verbose=False)
+        return (time.monotonic() - started) * 1000
+
+    def target_recently_seen(self) -> bool:
+        return time.monotonic() - self._last_seen <= self.config.idle_seconds
+
+    def inference_size(self, loaded: LoadedModel) -> int:
+        if self.target_recently_seen():
+            return loaded.imgsz
+        return loaded.min_imgsz
+
+    def static_roi(self, width: int, height: int) -> tuple[int, int, int, int]:
+        roi = self.config.roi
+        x1 = int(max(0.0, min(float(roi.get("x1", 0.0)), 1.0)) * width)
+        y1 = int(max(0.0, min(float(roi.get("y1", 0.0)), 1.0)) * height)
+        x2 = int(max(0.0, min(float(roi.get("x2", 1.0)), 1.0)) * width)
+        y2 = int(max(0.0, min(float(roi.get("y2", 1.0)), 1.0)) * height)
+        if x2 - x1 < 32 or y2 - y1 < 32:
+            return 0, 0, width, height
+        return x1, y1, x2, y2
+
+    def roi_bounds(self, width: int, height: int) -> tuple[int, int, int, int]:
+        bounds = self.static_roi(width, height)
+        if (
+            not self.config.auto_roi
+            or self._tracked_roi is None
+            or not self.target_recently_seen()
+        ):
+            return bounds
+
+        x1, y1, x2, y2 = self._tracked_roi
+        x1, y1 = max(x1, bounds[0]), max(y1, bounds[1])
+        x2, y2 = min(x2, bounds[2]), min(y2, bounds[3])
+        if x2 - x1 < 32 or y2 - y1 < 32:
+            return bounds
+        return x1, y1, x2, y2
+
+    def track_roi(self, xyxy: np.ndarray, width: int, height: int):
+        self._last_seen = time.monotonic()
+        pad_x = self.config.roi_padding * width
+        pad_y = self.config.roi_padding * height
+        self._tracked_roi = (
+            int(max(0, xyxy[:, 0].min() - pad_x)),
+            int(max(0, xyxy[:, 1].min() - pad_y)),
+            int(min(width, xyxy[:, 2].max() + pad_x)),
+            int(min(height, xyxy[:, 3].max() + pad_y)),
+        )
+
+    def set_resolution(self, resolution: dict[str, int] | None):
+        resolution = dict(resolution) if resolution else None
+        if resolution == self.resolution:
+            return
+        self.resolution = resolution
+        loaded = self.loaded
+        if loaded is None:
+            return
+        try:
+            loaded.warmup_ms = self.warmup(loaded, self.config.warmup_runs)
         except Exception as exc:
-            self.model = None
-            self.status_reason = f"YOLO unavailable: {exc}"
+            self.status_reason = f"Warm-up failed: {exc}"
+
+    def prepare_input(self, frame: np.ndarray) -> tuple[np.ndarray, float, float]:
+        if self.resolution is None:
+            return frame, 1.0, 1.0
+
+        height, width = frame.shape[:2]
+        target_width = self.resolution["x"]
+        target_height = self.resolution["y"]
+        if width == target_width and height == target_height:
+            return frame, 1.0, 1.0
+
+        shape = (target_height, target_width, 3)
+        if self._input_buffer is None or self._input_buffer.shape != shape:
+            self._input_buffer = np.empty(shape, dtype=np.uint8)
+        resized = cv2.resize(
+            frame, (target_width, target_height), dst=self._input_buffer
+        )
+        return resized, width / target_width, height / target_height
+
+    @staticmethod
+    def exported_model_path(model_path: str, config: YoloConfig) -> Path:
+        source = Path(model_path)
+        _export_format, suffix = EXPORT_FORMATS[config.engine]
+        return source.with_name(f"{source.stem}_{config.imgsz}{suffix}")
+
+    def export_model(self, yolo_class, model_path: str, config: YoloConfig) -> str:
+        source = Path(model_path)
+        if source.suffix != ".pt":
+            return model_path
+
+        target = self.exported_model_path(model_path, config)
+        if target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+            return str(target)
+
+        export_format, _suffix = EXPORT_FORMATS[config.engine]
+        exported = Path(
+            yolo_class(model_path).export(format=export_format, imgsz=config.imgsz)
+        )
+        if target.is_dir():
+            shutil.rmtree(target)
+        elif target.exists():
+            target.unlink()
+        exported.rename(target)
+        return str(target)
 
     @staticmethod
     def resolve_model_path(path_value: str) -> str:
@@ -393,145 +1258,191 @@ class YoloDetector:
         return str(candidates[0])
 
     def apply_config(self, config: YoloConfig):
-        reload_required = (
-            config.enabled != self.config.enabled
-            or config.path != self.config.path
-            or config.min_confidence != self.config.min_confidence
-        )
-        if reload_required:
-            self.load(config)
-        else:
+        if self.model_key(config) == self._model_key:
             self.config = config
+        elif config.enabled:
+            self.reload_in_background(config)
+        else:
+            self.load(config)
 
     def detect(self, frame: np.ndarray | None) -> DetectionResult:
         if frame is None:
             return DetectionResult(0.0, [], False, "Capture disabled")
         if not self.config.enabled:
             return DetectionResult(0.0, [], False, "YOLO disabled")
-        if self.model is None:
-            return DetectionResult(0.0, [], False, self.status_reason)
+        loaded = self.loaded
+        if loaded is None:
+            reason = "Loading model" if self.reloading else self.status_reason
+            return DetectionResult(0.0, [], False, reason)
 
         try:
-            infer = self.model(frame, verbose=False)
-            result = infer[0]
-            boxes = []
-
-            confidences: list[float] = []
-            names = getattr(result, "names", {})
-            for detection in result.boxes:
-                confidence = float(detection.conf.item())
-                if confidence < self.config.min_confidence:
-                    continue
-
-                xyxy = detection.xyxy[0].tolist()
-                class_id = (
-                    int(detection.cls.item()) if detection.cls is not None else -1
-                )
-                _label: str = (
-                    names.get(class_id, str(class_id))
-                    if isinstance(names, dict)
-                    else str(class_id)
-                )
-                boxes.append(
-                    DetectionBox(
-                        x1=int(xyxy[0]),
-                        y1=int(xyxy[1]),
-                        x2=int(xyxy[2]),
-                        y2=int(xyxy[3]),
-                        confidence=confidence,
-                        label="hand",
-                    )
-                )
-                confidences.append(confidence)
+            image, scale_x, scale_y = self.prepare_input(frame)
+            height, width = image.shape[:2]
+            x1, y1, x2, y2 = self.roi_bounds(width, height)
+            infer = loaded.model(
+                image[y1:y2, x1:x2],
+                imgsz=self.inference_size(loaded),
+                verbose=False,
+            )
+            detections = infer[0].boxes
+            if detections is None or len(detections) == 0:
+                return DetectionResult(0.0, [], True, "No detections")
 
-            if not confidences:
+            detections = detections.cpu().numpy()
+            confidences = np.asarray(detections.conf, dtype=np.float32)
+            mask = confidences >= self.config.min_confidence
+            if not mask.any():
                 return DetectionResult(0.0, [], True, "No detections")
 
-            severity = float(sum(confidences) / len(confidences))
-            return DetectionResult(severity, boxes, True, "Detections available")
+            xyxy = np.asarray(detections.xyxy, dtype=np.float32)[mask]
+            xyxy[:, [0, 2]] += x1
+            xyxy[:, [1, 3]] += y1
+            self.track_roi(xyxy, width, height)
+            box_array = np.empty(int(mask.sum()), dtype=DETECTION_DTYPE)
+            box_array["x1"] = xyxy[:, 0] * scale_x
+            box_array["y1"] = xyxy[:, 1] * scale_y
+            box_array["x2"] = xyxy[:, 2] * scale_x
+            box_array["y2"] = xyxy[:, 3] * scale_y
+            box_array["confidence"] = confidences[mask]
+            box_array["class_id"] = (
+                np.asarray(detections.cls)[mask] if detections.cls is not None else -1
+            )
+            box_array["track_id"] = -1
+
+            severity = float(box_array["confidence"].mean())
+            return DetectionResult(severity, box_array, True, "Detections available")
         except Exception as exc:
             return DetectionResult(0.0, [], False, f"Inference error: {exc}")
 
 
 class SprayController:
-    def __init__(
-        self, servos: ServoRig, detection_supplier: Callable[[], DetectionResult]
-    ):
+    def __init__(self, servos: ServoRig):
         self.servos = servos
-        self._detection_supplier = detection_supplier
+        self._detection = DetectionResult(0.0, [], False, "Waiting for frame")
         self.paused = False
-        self._spray_thread: threading.Thread | None = None
-        self._spray_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._state = SPRAY_STATE_IDLE
+        self._detection_signalled = False
+        self._manual_request: float | None = None
+        self._shutdown = False
         self._last_cycle_time = 0.0
         self.idle_scan_interval = 2.0
+        self.max_detection_age = MAX_DETECTION_AGE
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
 
     def set_paused(self, paused: bool):
-        self.paused = paused
+        with self._condition:
+            self.paused = paused
+            if paused:
+                self._manual_request = None
+            self._condition.notify_all()
 
     @property
     def is_paused(self) -> bool:
         return self.paused
 
     @property
-    def is_spraying(self) -> bool:
-        return self._spray_thread is not None and self._spray_thread.is_alive()
-
-    def maybe_auto_spray(self):
-        if self.paused or self.is_spraying:
-            return
+    def state(self) -> str:
+        if self.paused:
+            return SPRAY_STATE_PAUSED
+        return self._state
 
-        detection = self._detection_supplier()
-        if detection.severity > 0:
-            self.start_spray_thread(detection.severity)
-            return
+    @property
+    def is_spraying(self) -> bool:
+        return self._state != SPRAY_STATE_IDLE
 
-        if time.monotonic() - self._last_cycle_time >= self.idle_scan_interval:
-            self.start_spray_thread(0.0)
+    @property
+    def interrupted(self) -> bool:
+        return self.paused or self._shutdown
+
+    def current_severity(self) -> float:
+        detection = self._detection
+        if detection.age > self.max_detection_age:
+            return 0.0
+        return detection.severity
+
+    def on_detection(self, detection: DetectionResult):
+        with self._condition:
+            self._detection = detection
+            if detection.sequence >= 0:
+                self._detection_signalled = True
+                self._condition.notify_all()
 
     def manual_spray(self):
-        if self.is_spraying:
-            return
-        detection = self._detection_supplier()
-        severity = max(detection.severity, 0.3)
-        self.start_spray_thread(severity)
-
-    def start_spray_thread(self, severity: float):
-        with self._spray_lock:
-            if self.is_spraying:
+        with self._condition:
+            if self.paused or self.is_spraying:
                 return
-            self._last_cycle_time = time.monotonic()
-            self._spray_thread = threading.Thread(
-                target=self.spray_sequence, args=(severity,), daemon=True
-            )
-            self._spray_thread.start()
+            self._manual_request = max(self._detection.severity, 0.3)
+            self._condition.notify_all()
+
+    def next_severity(self) -> float | None:
+        if self._manual_request is not None:
+            severity, self._manual_request = self._manual_request, None
+            return severity
+        if not self._detection_signalled:
+            return None
+
+        self._detection_signalled = False
+        severity = self.current_severity()
+        if severity > 0:
+            return severity
+        if time.monotonic() - self._last_cycle_time >= self.idle_scan_interval:
+            return 0.0
+        return None
+
+    def poll_severity(self) -> float | None:
+        with self._condition:
+            return self.next_severity()
+
+    def wait_for_cycle(self) -> float | None:
+        with self._condition:
+            while not self._shutdown:
+                severity = None if self.paused else self.next_severity()
+                if severity is not None:
+                    self._last_cycle_time = time.monotonic()
+                    self._state = (
+                        SPRAY_STATE_SPRAYING if severity > 0 else SPRAY_STATE_SCANNING
+                    )
+                    return severity
+                self._condition.wait()
+        return None
+
+    def run(self):
+        while True:
+            severity = self.wait_for_cycle()
+            if severity is None:
+                return
+            try:
+                self.spray_sequence(severity)
+            finally:
+                with self._condition:
+                    self._state = SPRAY_STATE_IDLE
 
     def sleep_or_pause(self, seconds: float):
-        elapsed = 0.0
-        while elapsed < seconds and not self.paused:
-            interval = min(0.05, seconds - elapsed)
-            time.sleep(interval)
-            elapsed += interval
+        with self._condition:
+            self._condition.wait_for(lambda: self.interrupted, seconds)
 
     def pump_for_severity(self, severity: float):
-        if self.paused:
+        if self.interrupted:
             return
         self.servos.set_pumps(True)
+        self.sleep_or_pause(self.servos.remaining_motion_time(self.servos.pumps))
+        if self.interrupted:
+            self.servos.set_pumps(False)
+            return
         self.sleep_or_pause(max(0.1, min(severity, 1.0) * MAX_SPRAY_TIME))
         self.servos.set_pumps(False)
 
     def spray_sequence(self, initial_severity: float):
-        if self.paused:
+        if self.interrupted:
             return
 
         def spray_if_needed(severity_hint: float | None = None) -> bool:
-            if self.paused:
+            if self.interrupted:
                 return False
-            detection = self._detection_supplier()
-            severity = (
-                detection.severity
-                if severity_hint is None
-                else max(detection.severity, severity_hint)
-            )
+            current = self.current_severity()
+            severity = current if severity_hint is None else max(current, severity_hint)
             if severity <= 0:
                 return False
             self.pump_for_severity(severity)
@@ -541,8 +1452,13 @@ class SprayController:
             return
 
         self.servos.set_linkages(True)
-        self.sleep_or_pause(self.servos.linkage_hold_time)
-        if self.paused:
+        self.sleep_or_pause(
+            max(
+                self.servos.linkage_hold_time,
+                self.servos.remaining_motion_time(self.servos.linkages),
+            )
+        )
+        if self.interrupted:
             self.servos.set_linkages(False)
             return
 
@@ -551,29 +1467,51 @@ class SprayController:
             return
 
         for interval in range(ARM_HEIGHT_INTERVALS):
-            if self.paused:
+            if self.interrupted:
                 self.servos.set_linkages(False)
                 return
             self.servos.set_arm_height((interval + 1) / ARM_HEIGHT_INTERVALS)
+            self.sleep_or_pause(self.servos.remaining_motion_time(self.servos.arms))
+            if self.interrupted:
+                self.servos.set_linkages(False)
+                return
             if spray_if_needed():
                 self.servos.set_linkages(False)
                 return
 
         self.servos.set_linkages(False)
 
+    def close(self):
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        self._thread.join(SPRAY_STOP_TIMEOUT)
+
 
 def draw_boxes(frame: np.ndarray, detection: DetectionResult) -> np.ndarray:
     output = frame.copy()
+    draw_boxes_into(output, detection)
+    return output
+
+
+def draw_boxes_into(
+    output: np.ndarray, detection: DetectionResult, scale: float = 1.0
+) -> np.ndarray:
+    colour = (0, 255, 0, 255)[: output.shape[2]]
     for box in detection.boxes:
-        cv2.rectangle(output, (box.x1, box.y1), (box.x2, box.y2), (0, 255, 0), 2)
+        x1, y1 = int(box.x1 * scale), int(box.y1 * scale)
+        x2, y2 = int(box.x2 * scale), int(box.y2 * scale)
+        cv2.rectangle(output, (x1, y1), (x2, y2), colour, 2)
         text = f"{box.label} {box.confidence:.2f}"
+        if box.track_id >= 0:
+            text = f"{box.label} #{box.track_id} {box.confidence:.2f}"
         cv2.putText(
             output,
             text,
-            (box.x1, max(0, box.y1 - 8)),
+            (x1, max(0, y1 - 8)),
             cv2.FONT_HERSHEY_SIMPLEX,
             0.5,
-            (0, 255, 0),
+            colour,
             2,
             cv2.LINE_AA,
         )
@@ -0,0 +1,127 @@
+from typing import TYPE_CHECKING
+import cv2
+import numpy as np
+from PIL import Image
+from controllers import DetectionResult, draw_boxes_into
+
+if TYPE_CHECKING:
+    import tkinter as tk
+    from PIL import ImageTk
+
+MIN_DISPLAY_SIZE = (320, 240)
+
+
+class Letterbox:
+    def __init__(self):
+        self.canvas: np.ndarray | None = None
+        self.scale = 1.0
+        self.interpolation = cv2.INTER_LINEAR
+        self._geometry: tuple[int, int, int, int] | None = None
+        self._scaled: np.ndarray | None = None
+        self._view: np.ndarray | None = None
+
+    def configure(
+        self, frame_width: int, frame_height: int, target_width: int, target_height: int
+    ):
+        geometry = (frame_width, frame_height, target_width, target_height)
+        if geometry == self._geometry:
+            return
+        self._geometry = geometry
+
+        if self.canvas is None or self.canvas.shape[:2] != (
+            target_height,
+            target_width,
+        ):
+            self.canvas = np.zeros((target_height, target_width, 4), dtype=np.uint8)
+        else:
+            self.canvas[..., :3] = 0
+        self.canvas[..., 3] = 255
+
+        self.scale = min(target_width / frame_width, target_height / frame_height)
+        new_width = max(1, min(target_width, int(frame_width * self.scale)))
+        new_height = max(1, min(target_height, int(frame_height * self.scale)))
+        x_offset = (target_width - new_width) // 2
+        y_offset = (target_height - new_height) // 2
+
+        self.interpolation = cv2.INTER_AREA if self.scale < 1 else cv2.INTER_LINEAR
+        self._scaled = np.empty((new_height, new_width, 3), dtype=np.uint8)
+        self._view = self.canvas[
+            y_offset : y_offset + new_height, x_offset : x_offset + new_width
+        ]
+
+    def render(
+        self,
+        frame: np.ndarray,
+        detection: DetectionResult | None,
+        target_width: int,
+        target_height: int,
+    ) -> np.ndarray:
+        frame_height, frame_width = frame.shape[:2]
+        self.configure(frame_width, frame_height, target_width, target_height)
+
+        new_height, new_width = self._scaled.shape[:2]
+        cv2.resize(
+            frame,
+            (new_width, new_height),
+            dst=self._scaled,
+            interpolation=self.interpolation,
+        )
+        cv2.cvtColor(self._scaled, cv2.COLOR_BGR2RGBA, dst=self._view)
+        if detection is not None:
+            draw_boxes_into(self._view, detection, self.scale)
+        return self.canvas
+
+
+class VideoView:
+    def __init__(self, label: "tk.Label"):
+        self.label = label
+        self.letterbox = Letterbox()
+        self._canvas: np.ndarray | None = None
+        self._image: Image.Image | None = None
+        self._photo: "ImageTk.PhotoImage | None" = None
+        self._blank: np.ndarray | None = None
+
+    def show(
+        self,
+        frame: np.ndarray,
+        detection: DetectionResult | None,
+        target_width: int,
+        target_height: int,
+    ):
+        target_width = max(MIN_DISPLAY_SIZE[0], target_width)
+        target_height = max(MIN_DISPLAY_SIZE[1], target_height)
+        canvas = self.letterbox.render(frame, detection, target_width, target_height)
+
+        if canvas is self._canvas:
+            self._photo.paste(self._image)
+            return
+
+        # The PIL image maps the canvas memory directly, so later frames only
+        # need the paste into the existing Tk photo.
+        self._canvas = canvas
+        height, width = canvas.shape[:2]
+        self._image = Image.frombuffer(
+            "RGBA", (width, height), canvas, "raw", "RGBA", 0, 1
+        )
+        from PIL import ImageTk
+
+        self._photo = ImageTk.PhotoImage(image=self._image)
+        self.label.configure(image=self._photo)
+
+    def blank_frame(self, width: int, height: int) -> np.ndarray:
+        if self._blank is not None and self._blank.shape[:2] == (height, width):
+            return self._blank
+
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        cv2.putText(
+            frame,
+            "Capture disabled",
+            (20, 40),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1,
+            (200, 200, 200),
+            2,
+            cv2.LINE_AA,
+        )
+        self._blank = frame
+        return frame
@@ -0,0 +1,144 @@
+import argparse
+import signal
+import threading
+import time
+from config import Config
+from constants import CONFIG_PATH
+from controllers import (
+    SPRAY_STATE_PAUSED,
+    SPRAY_STATE_SCANNING,
+    SPRAY_STATE_SPRAYING,
+    CaptureManager,
+    DetectionResult,
+    ServoRig,
+    SprayController,
+)
+from inference import DetectionBus, create_inference_worker, rate_interval
+
+ENGINE_STOP_TIMEOUT = 2.0
+STATUS_INTERVAL = 5.0
+
+
+class Engine:
+    def __init__(self, config: Config, paused: bool = False):
+        self.config = config
+        self.capture_manager = CaptureManager(config.capture, open_now=False)
+        self.capture_manager.opening = config.capture.enabled
+        threading.Thread(
+            target=self.capture_manager.apply_config,
+            args=(config.capture,),
+            daemon=True,
+        ).start()
+        self.servo_rig = ServoRig(config.servo_pins)
+        self.spray_controller = SprayController(self.servo_rig)
+        self.spray_controller.set_paused(paused)
+
+        self.latest_detection = DetectionResult(0.0, [], False, "Waiting for frame")
+        self.detection_bus = DetectionBus()
+        self.detection_bus.subscribe(self.spray_controller.on_detection)
+        self.detection_bus.subscribe(self.on_detection)
+        self.inference_backend = config.yolo.backend
+        self.inference_worker = create_inference_worker(
+            config.yolo,
+            config.capture,
+            self.capture_manager.latest_frame,
+            self.detection_bus,
+        )
+
+        self.started_at = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def on_detection(self, detection: DetectionResult):
+        self.latest_detection = detection
+
+    def apply_config(self, config: Config):
+        self.config = config
+        self.capture_manager.apply_config(config.capture)
+        if config.yolo.backend != self.inference_backend:
+            self.inference_worker.close()
+            self.inference_backend = config.yolo.backend
+            self.inference_worker = create_inference_worker(
+                config.yolo,
+                config.capture,
+                self.capture_manager.latest_frame,
+                self.detection_bus,
+            )
+        else:
+            self.inference_worker.apply_config(config.yolo, config.capture)
+        self.servo_rig.apply_config(config.servo_pins)
+
+    def current_stage(self) -> str:
+        state = self.spray_controller.state
+        if state == SPRAY_STATE_PAUSED:
+            return "Paused"
+        if state == SPRAY_STATE_SPRAYING:
+            return "Spraying"
+        if state == SPRAY_STATE_SCANNING:
+            return "Scanning"
+        if self.latest_detection.severity > 0:
+            return "Target detected"
+        return "Searching"
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            capture = self.config.capture
+            if not capture.threaded_grab:
+                self.capture_manager.read_latest()
+            self._stop.wait(
+                max(
+                    0.0,
+                    rate_interval(capture.capture_fps) - (time.monotonic() - started),
+                )
+            )
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(ENGINE_STOP_TIMEOUT)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self.capture_manager.close()
+        self.inference_worker.close()
+        self.spray_controller.close()
+        self.servo_rig.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run capture, detection and spraying without the GUI."
+    )
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--paused", action="store_true")
+    args = parser.parse_args()
+
+    engine = Engine(Config.load_from_file(args.config), paused=args.paused)
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    engine.start()
+    try:
+        while not stopped.wait(STATUS_INTERVAL):
+            detection = engine.latest_detection
+            print(
+                f"{engine.current_stage()}: {detection.reason or 'Idle'} "
+                f"(confidence {detection.severity:.2f})",
+                flush=True,
+            )
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+import multiprocessing
+import threading
+import time
+from dataclasses import replace
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+import cv2
+import numpy as np
+from config import CaptureConfig, YoloConfig
+from controllers import CapturedFrame, DetectionResult, YoloDetector
+from tracking import Tracker
+
+PROCESS_STOP_TIMEOUT = 2.0
+WORKER_STOP_TIMEOUT = PROCESS_STOP_TIMEOUT + 3.0
+MOTION_SAMPLE_SIZE = (96, 54)
+
+
+def rate_interval(fps: int | float) -> float:
+    return 1.0 / max(1.0, float(fps))
+
+
+class MotionGate:
+    def __init__(self, config: YoloConfig):
+        self.config = config
+        width, height = MOTION_SAMPLE_SIZE
+        self._small = np.empty((height, width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, width), dtype=np.uint8)
+        self._reference: np.ndarray | None = None
+        self._last_inference = 0.0
+        self.last_score = 0.0
+
+    def reset(self):
+        self._reference = None
+
+    def score(self, image: np.ndarray) -> float:
+        cv2.resize(
+            image, MOTION_SAMPLE_SIZE, dst=self._small, interpolation=cv2.INTER_AREA
+        )
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self._reference is None:
+            return float("inf")
+        return float(cv2.absdiff(self._gray, self._reference).mean())
+
+    def should_infer(self, frame: CapturedFrame, force: bool = False) -> bool:
+        if not self.config.motion_gating:
+            return True
+
+        self.last_score = self.score(frame.image)
+        overdue = (
+            frame.timestamp - self._last_inference >= self.config.max_inference_interval
+        )
+        if not force and self.last_score < self.config.motion_threshold and not overdue:
+            return False
+
+        if self._reference is None:
+            self._reference = self._gray.copy()
+        else:
+            np.copyto(self._reference, self._gray)
+        self._last_inference = frame.timestamp
+        return True
+
+
+class DetectionBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[DetectionResult], None]] = []
+        self._latest = DetectionResult(0.0, [], False, "Loading model")
+
+    @property
+    def latest(self) -> DetectionResult:
+        with self._lock:
+            return self._latest
+
+    def subscribe(self, callback: Callable[[DetectionResult], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[DetectionResult], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, result: DetectionResult):
+        with self._lock:
+            self._latest = result
+            subscribers = tuple(self._subscribers)
+        for callback in subscribers:
+            callback(result)
+
+
+class InferenceWorker:
+    def __init__(
+        self,
+        config: YoloConfig,
+        capture: CaptureConfig,
+        frame_source: Callable[[], CapturedFrame | None],
+        bus: DetectionBus,
+        start: bool = True,
+    ):
+        self.config = config
+        self.resolution = dict(capture.resolution)
+        self.interval = rate_interval(capture.inference_fps)
+        self.frame_source = frame_source
+        self.bus = bus
+        self.detector: YoloDetector | None = None
+        self._lock = threading.Lock()
+        self._pending_config: tuple[YoloConfig, dict[str, int]] | None = None
+        self._last_inferred: DetectionResult | None = None
+        self.gate = MotionGate(config)
+        self.tracker = Tracker()
+        self._last_sequence = -1
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        if start:
+            self._thread.start()
+
+    @property
+    def latest(self) -> DetectionResult:
+        return self.bus.latest
+
+    def publish(self, result: DetectionResult):
+        self.bus.publish(result)
+
+    def reset(self, reason: str):
+        self._last_sequence = -1
+        self._last_inferred = None
+        self.gate.reset()
+        self.tracker.reset()
+        self.publish(DetectionResult(0.0, [], False, reason))
+
+    def apply_config(self, config: YoloConfig, capture: CaptureConfig):
+        with self._lock:
+            self.config = config
+            self.resolution = dict(capture.resolution)
+            self.interval = rate_interval(capture.inference_fps)
+            self._pending_config = (config, self.resolution)
+
+    def apply_pending_config(self):
+        with self._lock:
+            pending = self._pending_config
+            self._pending_config = None
+        if pending is not None:
+            self.gate.config = pending[0]
+            self.gate.reset()
+            self.tracker.reset()
+            self.configure_backend(*pending)
+
+    def report_progress(self, status: str):
+        if self.detector is None or self.detector.loaded is None:
+            self.publish(DetectionResult(0.0, [], False, status))
+
+    def start_backend(self):
+        self.detector = YoloDetector(
+            self.config, self.resolution, on_progress=self.report_progress
+        )
+
+    def configure_backend(self, config: YoloConfig, resolution: dict[str, int]):
+        if self.detector is not None:
+            self.detector.apply_config(config)
+            self.detector.set_resolution(resolution)
+
+    def backend_status(self) -> str:
+        if self.detector is None:
+            return "Loading model"
+        return self.detector.status_reason
+
+    @property
+    def warmup_ms(self) -> float | None:
+        if self.detector is None:
+            return None
+        return self.detector.warmup_ms
+
+    def stop_backend(self):
+        self.detector = None
+
+    def run_inference(self, frame: CapturedFrame) -> DetectionResult:
+        return self.detector.detect(frame.image)
+
+    def process(self, frame: CapturedFrame) -> DetectionResult:
+        # Only an active result is worth reusing; anything else is retried.
+        last = self._last_inferred
+        if self.gate.should_infer(frame, force=last is None or not last.active):
+            result = self.run_inference(frame)
+            result.sequence = frame.sequence
+            result.timestamp = frame.timestamp
+            self._last_inferred = result
+            if self.config.tracking:
+                result = self.tracker.update(result)
+            return result
+
+        result = replace(
+            self._last_inferred,
+            age=frame.timestamp - self._last_inferred.timestamp,
+        )
+        if self.config.tracking:
+            result = self.tracker.predict(frame.timestamp, result)
+        return result
+
+    def run(self):
+        self.start_backend()
+        self.publish(
+            DetectionResult(
+                0.0, [], False, self.backend_status() or "Waiting for frame"
+            )
+        )
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self.apply_pending_config()
+                frame = self.frame_source()
+                if frame is None:
+                    if self._last_sequence != -1:
+                        self.reset("Waiting for frame")
+                elif frame.sequence != self._last_sequence:
+                    self._last_sequence = frame.sequence
+                    result = self.process(frame)
+                    if not self._stop.is_set():
+                        self.publish(result)
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            self.stop_backend()
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(WORKER_STOP_TIMEOUT)
+
+
+class ProcessInferenceWorker(InferenceWorker):
+    def __init__(
+        self,
+        config: YoloConfig,
+        capture: CaptureConfig,
+        frame_source: Callable[[], CapturedFrame | None],
+        bus: DetectionBus,
+        start: bool = True,
+    ):
+        self._process: multiprocessing.process.BaseProcess | None = None
+        self._connection = None
+        self._segment: SharedMemory | None = None
+        self._status = "Loading model"
+        self._warmup_ms: float | None = None
+        super().__init__(config, capture, frame_source, bus, start)
+
+    def start_backend(self):
+        context = multiprocessing.get_context("spawn")
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(
+            target=inference_process_main,
+            args=(child_connection, self.config, self.resolution),
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+        self.allocate_segment(self.resolution["x"] * self.resolution["y"] * 3)
+        try:
+            message = self._connection.recv()
+            while message[0] == "progress":
+                self.report_progress(message[1])
+                message = self._connection.recv()
+            _, self._status, self._warmup_ms = message
+        except (EOFError, OSError) as exc:
+            self._status = f"Inference process stopped: {exc}"
+
+    def allocate_segment(self, size: int):
+        self.release_segment()
+        self._segment = SharedMemory(create=True, size=max(1, size))
+
+    def release_segment(self):
+        if self._segment is None:
+            return
+        self._segment.close()
+        self._segment.unlink()
+        self._segment = None
+
+    def report_progress(self, status: str):
+        self.publish(DetectionResult(0.0, [], False, status))
+
+    def backend_status(self) -> str:
+        return self._status
+
+    @property
+    def warmup_ms(self) -> float | None:
+        return self._warmup_ms
+
+    def configure_backend(self, config: YoloConfig, resolution: dict[str, int]):
+        try:
+            self._connection.send(("config", config, resolution))
+        except (EOFError, OSError):
+            pass
+
+    def run_inference(self, frame: CapturedFrame) -> DetectionResult:
+        image = np.ascontiguousarray(frame.image, dtype=np.uint8)
+        if image.nbytes > self._segment.size:
+            self.allocate_segment(image.nbytes)
+        shared = np.ndarray(image.shape, dtype=np.uint8, buffer=self._segment.buf)
+        np.copyto(shared, image)
+        del shared
+
+        try:
+            self._connection.send(("frame", self._segment.name, image.shape))
+            severity, box_array, active, reason, self._warmup_ms = (
+                self._connection.recv()
+            )
+        except (EOFError, OSError) as exc:
+            return DetectionResult(0.0, [], False, f"Inference process stopped: {exc}")
+        return DetectionResult(severity, box_array, active, reason)
+
+    def stop_backend(self):
+        try:
+            self._connection.send(("stop",))
+        except (EOFError, OSError):
+            pass
+        self._process.join(PROCESS_STOP_TIMEOUT)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._connection.close()
+        self.release_segment()
+
+
+def close_segment(segment: SharedMemory | None):
+    if segment is None:
+        return
+    try:
+        segment.close()
+    except BufferError:
+        pass
+
+
+def inference_process_main(connection, config: YoloConfig, resolution: dict[str, int]):
+    detector = YoloDetector(
+        config,
+        resolution,
+        on_progress=lambda status: connection.send(("progress", status)),
+    )
+    # Reloads run on a background thread and must not interleave with replies.
+    detector.on_progress = None
+    connection.send(
+        ("ready", detector.status_reason or "Waiting for frame", detector.warmup_ms)
+    )
+    segment: SharedMemory | None = None
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "stop":
+                break
+            if kind == "config":
+                detector.apply_config(message[1])
+                detector.set_resolution(message[2])
+                continue
+
+            _, name, shape = message
+            if segment is None or segment.name != name:
+                close_segment(segment)
+                segment = SharedMemory(name=name)
+            image = np.ndarray(shape, dtype=np.uint8, buffer=segment.buf)
+            result = detector.detect(image)
+            del image
+            connection.send(
+                (
+                    result.severity,
+                    result.box_array,
+                    result.active,
+                    result.reason,
+                    detector.warmup_ms,
+                )
+            )
+    finally:
+        close_segment(segment)
+        connection.close()
+
+
+def create_inference_worker(
+    config: YoloConfig,
+    capture: CaptureConfig,
+    frame_source: Callable[[], CapturedFrame | None],
+    bus: DetectionBus,
+    start: bool = True,
+) -> InferenceWorker:
+    if config.backend == "process":
+        return ProcessInferenceWorker(config, capture, frame_source, bus, start)
+    return InferenceWorker(config, capture, frame_source, bus, start)
@@ -1,22 +1,28 @@
 from dataclasses import dataclass, field
 from pathlib import Path
+import threading
 import time
+import tkinter as tk
+from typing import TYPE_CHECKING
 import customtkinter as ctk
-import cv2
-import numpy as np
 from PIL import Image
 from config import Config
-from constants import ALTERNATE_DARK_COLOUR, CONFIG_PATH, WINDOW_SIZE, UI_SCALE
-from controllers import (
-    CaptureManager,
-    DetectionResult,
-    ServoRig,
-    SprayController,
-    YoloDetector,
-    draw_boxes,
+from constants import (
+    ALTERNATE_DARK_COLOUR,
+    CONFIG_PATH,
+    MANUAL_TARGET_ALL,
+    STARTUP_POLL_MS,
+    UI_SCALE,
+    WINDOW_SIZE,
 )
 from overlays import Overlay
 from settings import SettingsPopUp
+from telemetry import TelemetrySampler
+
+if TYPE_CHECKING:
+    from controllers import DetectionResult
+    from display import VideoView
+    from engine import Engine
 
 
 @dataclass
@@ -63,19 +69,27 @@ class App(ctk.CTk):
             self.config.capture.resolution["y"],
         )
 
-        self.capture_manager = CaptureManager(self.config.capture)
-        self.yolo_detector = YoloDetector(self.config.yolo)
-        self.servo_rig = ServoRig(self.config.servo_pins)
+        self.engine: Engine | None = None
+        self._loaded_engine: Engine | None = None
+        self.startup_status = "Loading modules"
+        self._config_pending = False
+        self._closing = False
+        self.telemetry = TelemetrySampler()
 
-        self.last_detection = DetectionResult(0.0, [], False, "Waiting for frame")
-        self.spray_controller = SprayController(self.servo_rig, self.get_last_detection)
-        self.spray_controller.set_paused(True)
+        self.last_detection: DetectionResult | None = None
+        self.latest_detection: DetectionResult | None = None
+        self.capture_unavailable: DetectionResult | None = None
         self.arm_raise_stage = 0
         self.started_at = time.monotonic()
         self.manual_control_enabled = False
 
-        self.video_widget = ctk.CTkLabel(self, text="")
+        self.video_widget = tk.Label(
+            self, bg=ALTERNATE_DARK_COLOUR, borderwidth=0, highlightthickness=0
+        )
         self.video_widget.pack(fill="both", expand=True)
+        self.video_view: VideoView | None = None
+        self.video_size = (0, 0)
+        self.video_widget.bind("<Configure>", self.on_video_resize)
 
         self.overlay = Overlay(
             self,
@@ -87,32 +101,78 @@ class App(ctk.CTk):
             on_manual_row_save_clamp=self.save_manual_row_clamp,
         )
         self.overlay.place(x=10, y=10)
-        self.update_servo_status()
-        self.overlay.set_manual_targets(
-            self.servo_rig.manual_targets(), self.manual_clamp_map()
-        )
+        self.overlay.set_capture_status("Starting")
+        self.overlay.set_yolo_status(self.startup_status)
 
         self.settings: SettingsPopUp | None = None
 
         self.bind("<Escape>", lambda _e: self.quit_app())
         self.protocol("WM_DELETE_WINDOW", self.quit_app)
 
-        self.open_settings()
+        self.update_idletasks()
+        threading.Thread(target=self.load_engine, daemon=True).start()
+        self.after(STARTUP_POLL_MS, self.poll_startup)
+        self.after_idle(self.open_settings)
+
+    def load_engine(self):
+        try:
+            from engine import Engine
+
+            self.startup_status = "Starting engine"
+            engine = Engine(self.config, paused=True)
+        except Exception as exc:
+            self.startup_status = f"Startup failed: {exc}"
+            return
+        if self._closing:
+            engine.close()
+            return
+        self._loaded_engine = engine
+
+    def poll_startup(self):
+        if self._closing:
+            return
+        if self._loaded_engine is None:
+            self.overlay.set_yolo_status(self.startup_status)
+            self.after(STARTUP_POLL_MS, self.poll_startup)
+            return
+        self.attach_engine(self._loaded_engine)
+
+    def attach_engine(self, engine: "Engine"):
+        from controllers import DetectionResult
+        from display import VideoView
+
+        self.engine = engine
+        self.video_view = VideoView(self.video_widget)
+        self.capture_unavailable = DetectionResult(
+            0.0, [], False, "Capture disabled or unavailable"
+        )
+        self.latest_detection = engine.detection_bus.latest
+        self.last_detection = self.latest_detection
+        engine.detection_bus.subscribe(self.on_detection)
+        if self._config_pending:
+            engine.apply_config(self.config)
+
+        self.update_servo_status()
+        self.overlay.set_manual_targets(
+            engine.servo_rig.manual_targets(), self.manual_clamp_map()
+        )
+        engine.start()
         self.start_camera()
 
-    def get_last_detection(self) -> DetectionResult:
-        return self.last_detection
+    def on_detection(self, detection: "DetectionResult"):
+        self.latest_detection = detection
 
     def apply_runtime_config(self, config: Config):
         self.config = config
         self.width = self.config.capture.resolution["x"]
         self.height = self.config.capture.resolution["y"]
 
-        self.capture_manager.apply_config(self.config.capture)
-        self.yolo_detector.apply_config(self.config.yolo)
-        self.servo_rig.apply_config(self.config.servo_pins)
+        if self.engine is None:
+            self._config_pending = True
+            return
+        self.engine.apply_config(self.config)
         self.overlay.set_manual_targets(
-            self.servo_rig.manual_targets(), self.manual_clamp_map()
+            self.engine.servo_rig.manual_targets(), self.manual_clamp_map()
         )
         self.update_servo_status()
 
@@ -128,113 +188,74 @@ class App(ctk.CTk):
         return mapping
 
     def update_servo_status(self):
-        if self.servo_rig.total_channels == 0:
+        servo_rig = self.engine.servo_rig
+        if servo_rig.total_channels == 0:
             self.overlay.set_servo_status("No channels configured")
             return
-        self.overlay.set_servo_status(
-            f"{self.servo_rig.available_channels}/{self.servo_rig.total_channels} active"
-        )
+        status = f"{servo_rig.available_channels}/{servo_rig.total_channels} active"
+        if self.config.servo_pins.backend == "simulated":
+            status = f"{status} (simulated)"
+        self.overlay.set_servo_status(status)
 
-    def start_camera(self):
-        frame = self.capture_manager.read()
+    def on_video_resize(self, event):
+        self.video_size = (int(event.width), int(event.height))
 
-        if frame is None:
-            display = self.blank_frame()
-            self.last_detection = DetectionResult(
-                0.0, [], False, "Capture disabled or unavailable"
-            )
+    def start_camera(self):
+        captured = self.engine.capture_manager.latest_frame()
+
+        if captured is None and self.engine.capture_manager.opening:
+            frame = self.video_view.blank_frame(self.width, self.height)
+            overlay_detection = None
+            self.last_detection = self.latest_detection
+            self.overlay.set_capture_status("Opening")
+            self.overlay.set_yolo_status(self.last_detection.reason or "Idle")
+        elif captured is None:
+            frame = self.video_view.blank_frame(self.width, self.height)
+            overlay_detection = None
+            self.last_detection = self.capture_unavailable
             self.overlay.set_capture_status("Disabled/Unavailable")
             self.overlay.set_yolo_status("Idle")
         else:
+            frame = captured.image
             self.overlay.set_capture_status("Running")
-            detection = self.yolo_detector.detect(frame)
+            detection = self.latest_detection
             self.last_detection = detection
 
             if detection.active and self.config.yolo.enabled:
-                display = draw_boxes(frame, detection)
+                overlay_detection = detection
                 self.overlay.set_yolo_status(
-                    "Running"
+                    self.yolo_running_status()
                     if detection.reason == "Detections available"
                     else detection.reason
                 )
             else:
-                display = frame
+                overlay_detection = None
                 self.overlay.set_yolo_status(detection.reason or "Inactive")
 
-            if not self.spray_controller.is_paused:
-                self.spray_controller.maybe_auto_spray()
-
         self.overlay.set_confidence(self.last_detection.severity)
         self.overlay.set_stage(self.current_stage())
-        self.overlay.set_paused_state(self.spray_controller.is_paused)
+        self.overlay.set_paused_state(self.engine.spray_controller.is_paused)
         self.overlay.set_uptime(self.format_uptime())
-        self.overlay.set_battery(self.read_battery_status())
+        vitals = self.telemetry.latest
+        self.overlay.set_battery(vitals.battery_text())
+        self.overlay.set_host_status(vitals.host_text())
         self.overlay.set_distance("10km")
 
-        self.update_idletasks()
-        target_width = max(320, int(self.video_widget.winfo_width()))
-        target_height = max(240, int(self.video_widget.winfo_height()))
-        display = self.fit_frame_to_widget(display, target_width, target_height)
-
-        opencv_image = cv2.cvtColor(display, cv2.COLOR_BGR2RGB)
-        captured_image = Image.fromarray(opencv_image)
-        photo_image = ctk.CTkImage(
-            light_image=captured_image,
-            dark_image=captured_image,
-            size=(
-                max(1, int(target_width / UI_SCALE)),
-                max(1, int(target_height / UI_SCALE)),
-            ),
-        )
-        self.video_widget.configure(image=photo_image)
-        self.video_widget.image = photo_image
+        self.video_view.show(frame, overlay_detection, *self.video_size)
         self.video_widget.after(self.frame_interval_ms(), self.start_camera)
 
+    def yolo_running_status(self) -> str:
+        warmup_ms = self.engine.inference_worker.warmup_ms
+        if warmup_ms is None:
+            return "Running"
+        return f"Running (warm-up {warmup_ms:.0f} ms)"
+
     def frame_interval_ms(self) -> int:
-        fps = max(1, int(self.config.capture.capture_fps))
+        fps = max(1, int(self.config.capture.display_fps))
         return max(1, int(1000 / fps))
 
-    def fit_frame_to_widget(self, frame, target_width: int, target_height: int):
-        frame_height, frame_width = frame.shape[:2]
-        if frame_height <= 0 or frame_width <= 0:
-            return cv2.resize(frame, (target_width, target_height))
-
-        scale = min(target_width / frame_width, target_height / frame_height)
-        new_width = max(1, int(frame_width * scale))
-        new_height = max(1, int(frame_height * scale))
-
-        resized = cv2.resize(frame, (new_width, new_height))
-        canvas = np.zeros((target_height, target_width, 3), dtype=np.uint8)
-
-        x_offset = (target_width - new_width) // 2
-        y_offset = (target_height - new_height) // 2
-        canvas[y_offset : y_offset + new_height, x_offset : x_offset + new_width] = (
-            resized
-        )
-        return canvas
-
-    def blank_frame(self):
-        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-        cv2.putText(
-            frame,
-            "Capture disabled",
-            (20, 40),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            1,
-            (200, 200, 200),
-            2,
-            cv2.LINE_AA,
-        )
-        return frame
-
     def current_stage(self) -> str:
-        if self.spray_controller.is_paused:
-            return "Paused"
-        if self.spray_controller.is_spraying:
-            return "Spraying"
-        if self.last_detection.severity > 0:
-            return "Target detected"
-        return "Searching"
+        return self.engine.current_stage()
 
     def format_uptime(self) -> str:
         elapsed = int(max(0, time.monotonic() - self.started_at))
@@ -243,35 +264,30 @@ class App(ctk.CTk):
         seconds = elapsed % 60
         return f"{hours:02}:{minutes:02}:{seconds:02}"
 
-    def read_battery_status(self) -> str:
-        try:
-            import psutil
-
-            battery = psutil.sensors_battery()
-            if battery is None or battery.percent is None:
-                return "N/A"
-            return f"{int(battery.percent)}%"
-        except Exception:
-            return "N/A"
-
     def toggle_pause(self):
-        if self.manual_control_enabled:
+        if self.manual_control_enabled or self.engine is None:
             return
-        self.spray_controller.set_paused(not self.spray_controller.is_paused)
+        self.engine.spray_controller.set_paused(
+            not self.engine.spray_controller.is_paused
+        )
 
     def manual_spray(self):
-        self.spray_controller.manual_spray()
+        if self.engine is None:
+            return
+        self.engine.spray_controller.manual_spray()
 
     def raise_arm(self):
-        if self.manual_control_enabled:
+        if self.manual_control_enabled or self.engine is None:
             return
         self.arm_raise_stage = (self.arm_raise_stage + 1) % 4
-        self.servo_rig.set_arm_height(self.arm_raise_stage / 3, force=True)
+        self.engine.servo_rig.set_arm_height(self.arm_raise_stage / 3, force=True)
 
     def set_manual_control(self, enabled: bool):
         self.manual_control_enabled = enabled
-        self.spray_controller.set_paused(enabled)
-        self.overlay.set_paused_state(self.spray_controller.is_paused)
+        if self.engine is None:
+            return
+        self.engine.spray_controller.set_paused(enabled)
+        self.overlay.set_paused_state(self.engine.spray_controller.is_paused)
 
     def apply_manual_row(
         self,
@@ -281,7 +297,7 @@ class App(ctk.CTk):
         min_text: str,
         max_text: str,
     ):
-        if not self.manual_control_enabled:
+        if not self.manual_control_enabled or self.engine is None:
             return
         try:
             angle = float(angle_text)
@@ -294,12 +310,7 @@ class App(ctk.CTk):
         if clamp_enabled:
             angle = max(clamp_min, min(angle, clamp_max))
 
-        if target == "ALL":
-            for per_target in self.servo_rig.manual_targets():
-                self.servo_rig.set_manual_angle(per_target, angle, force=True)
-            return
-
-        self.servo_rig.set_manual_angle(target, angle, force=True)
+        self.engine.servo_rig.set_manual_angle(target, angle, force=True)
 
     def save_manual_row_clamp(
         self, target: str, clamp_enabled: bool, min_text: str, max_text: str
@@ -333,8 +344,8 @@ class App(ctk.CTk):
                         changed = True
                     break
 
-        if target == "ALL":
-            for t in self.servo_rig.manual_targets():
+        if target == MANUAL_TARGET_ALL:
+            for t in self.engine.servo_rig.manual_targets():
                 role, pin_text = t.split(":", 1)
                 apply_to(role, int(pin_text))
         else:
@@ -343,7 +354,7 @@ class App(ctk.CTk):
 
         if changed:
             self.config.save_to_file(CONFIG_PATH)
-            self.servo_rig.apply_config(self.config.servo_pins)
+            self.engine.servo_rig.apply_config(self.config.servo_pins)
 
     def open_settings(self):
         if self.settings is not None and self.settings.winfo_exists():
@@ -352,8 +363,10 @@ class App(ctk.CTk):
         self.settings = SettingsPopUp(self)
 
     def quit_app(self):
-        self.capture_manager.close()
-        self.servo_rig.shutdown()
+        self._closing = True
+        self.telemetry.close()
+        if self.engine is not None:
+            self.engine.close()
         self.destroy()
 
 
@@ -1,3 +1,4 @@
+import time
 from constants import *
 from widgets import *
 import customtkinter as ctk
@@ -16,6 +17,8 @@ class Overlay(ctk.CTkFrame):
         **kwargs,
     ):
         super().__init__(master, fg_color=TEXT_COLOUR, **kwargs)
+        self._rendered: dict[str, dict[str, object]] = {}
+        self._updated_at: dict[str, float] = {}
         row_frame = ctk.CTkFrame(self, fg_color="transparent")
         row_frame.pack(padx=10)
 
@@ -144,6 +147,15 @@ class Overlay(ctk.CTkFrame):
         )
         self.battery_label.pack(fill="x", pady=0, padx=10)
 
+        self.host_label = ctk.CTkLabel(
+            self,
+            text="Host: N/A",
+            font=TINY_BOLD_FONT,
+            text_color=DEFAULT_COLOUR,
+            anchor="w",
+        )
+        self.host_label.pack(fill="x", pady=0, padx=10)
+
         self.distance_label = ctk.CTkLabel(
             self,
             text="Distance: 10km",
@@ -191,34 +203,59 @@ class Overlay(ctk.CTkFrame):
         )
         self.manual_rows_frame.pack(fill="x", padx=8, pady=(0, PADDING_SMALL))
 
+    def update_widget(self, key: str, widget, **options) -> bool:
+        if self._rendered.get(key) == options:
+            return False
+        self._rendered[key] = options
+        widget.configure(**options)
+        return True
+
+    def throttled(self, key: str, interval: float) -> bool:
+        now = time.monotonic()
+        if now - self._updated_at.get(key, float("-inf")) < interval:
+            return True
+        self._updated_at[key] = now
+        return False
+
     def set_confidence(self, confidence: float):
         percentage = max(0.0, min(confidence, 1.0)) * 100
-        self.confidence_label.configure(text=f"{percentage:.1f}%")
+        self.update_widget(
+            "confidence", self.confidence_label, text=f"{percentage:.1f}%"
+        )
 
     def set_stage(self, stage: str):
-        self.stage_label.configure(text=f"Stage: {stage}")
+        self.update_widget("stage", self.stage_label, text=f"Stage: {stage}")
 
     def set_capture_status(self, status: str):
-        self.capture_label.configure(text=f"Capture: {status}")
+        self.update_widget("capture", self.capture_label, text=f"Capture: {status}")
 
     def set_yolo_status(self, status: str):
-        self.yolo_label.configure(text=f"YOLO: {status}")
+        self.update_widget("yolo", self.yolo_label, text=f"YOLO: {status}")
 
     def set_servo_status(self, status: str):
-        self.servo_label.configure(text=f"Servos: {status}")
+        self.update_widget("servo", self.servo_label, text=f"Servos: {status}")
 
     def set_uptime(self, uptime: str):
-        self.uptime_label.configure(text=f"Uptime: {uptime}")
+        if self.throttled("uptime", UPTIME_REFRESH_SECONDS):
+            return
+        self.update_widget("uptime", self.uptime_label, text=f"Uptime: {uptime}")
 
     def set_battery(self, battery: str):
-        self.battery_label.configure(text=f"Battery: {battery}")
+        if self.throttled("battery", BATTERY_REFRESH_SECONDS):
+            return
+        self.update_widget("battery", self.battery_label, text=f"Battery: {battery}")
+
+    def set_host_status(self, status: str):
+        self.update_widget("host", self.host_label, text=f"Host: {status}")
 
     def set_distance(self, distance: str):
-        self.distance_label.configure(text=f"Distance: {distance}")
+        self.update_widget(
+            "distance", self.distance_label, text=f"Distance: {distance}"
+        )
 
     def set_paused_state(self, paused: bool):
         color = DANGER_COLOUR if paused else "transparent"
-        self.pause_button.configure(fg_color=color)
+        self.update_widget("paused", self.pause_button, fg_color=color)
 
     def set_manual_targets(
         self,
@@ -239,7 +276,7 @@ class Overlay(ctk.CTkFrame):
             child.destroy()
         self.manual_rows = {}
 
-        full_targets = ["ALL"] + targets
+        full_targets = [MANUAL_TARGET_ALL] + targets
         for target in full_targets:
             row = ctk.CTkFrame(self.manual_rows_frame, fg_color="transparent")
             row.pack(fill="x", padx=4, pady=2)
@@ -28,19 +28,51 @@ class SettingsPopUp(ctk.CTkToplevel):
         self.default_angle_offset = ctk.DoubleVar(
             value=master.config.servo_pins.defaults.angle_offset
         )
+        self.default_max_velocity = ctk.DoubleVar(
+            value=master.config.servo_pins.defaults.max_velocity
+        )
+        self.default_max_acceleration = ctk.DoubleVar(
+            value=master.config.servo_pins.defaults.max_acceleration
+        )
+        self.smooth_motion = ctk.BooleanVar(
+            value=master.config.servo_pins.smooth_motion
+        )
+        self.control_rate = ctk.DoubleVar(value=master.config.servo_pins.control_rate)
+        self.servo_backend = ctk.StringVar(value=master.config.servo_pins.backend)
+        self.simulated_slew_rate = ctk.DoubleVar(
+            value=master.config.servo_pins.simulated_slew_rate
+        )
+        self.simulated_latency = ctk.DoubleVar(
+            value=master.config.servo_pins.simulated_latency
+        )
 
         self.resolution_x = ctk.IntVar(value=master.config.capture.resolution["x"])
         self.resolution_y = ctk.IntVar(value=master.config.capture.resolution["y"])
         self.capture_fps = ctk.IntVar(value=master.config.capture.capture_fps)
+        self.inference_fps = ctk.IntVar(value=master.config.capture.inference_fps)
+        self.display_fps = ctk.IntVar(value=master.config.capture.display_fps)
         self.ip_address = ctk.StringVar(value=master.config.capture.ip_address)
         self.use_webcam = ctk.BooleanVar(value=master.config.capture.use_webcam)
         self.capture_enabled = ctk.BooleanVar(value=master.config.capture.enabled)
+        self.threaded_grab = ctk.BooleanVar(value=master.config.capture.threaded_grab)
 
         self.min_confidence = ctk.DoubleVar(value=master.config.yolo.min_confidence)
         self.yolo_path = ctk.StringVar(
             value=master.config.yolo.path or "assets/main.pt"
         )
         self.yolo_enabled = ctk.BooleanVar(value=master.config.yolo.enabled)
+        self.yolo_backend = ctk.StringVar(value=master.config.yolo.backend)
+        self.yolo_engine = ctk.StringVar(value=master.config.yolo.engine)
+        self.yolo_imgsz = ctk.IntVar(value=master.config.yolo.imgsz)
+        self.yolo_min_imgsz = ctk.IntVar(value=master.config.yolo.min_imgsz)
+        self.adaptive_imgsz = ctk.BooleanVar(value=master.config.yolo.adaptive_imgsz)
+        self.auto_roi = ctk.BooleanVar(value=master.config.yolo.auto_roi)
+        self.motion_gating = ctk.BooleanVar(value=master.config.yolo.motion_gating)
+        self.tracking = ctk.BooleanVar(value=master.config.yolo.tracking)
+        roi = master.config.yolo.roi
+        self.yolo_roi = ctk.StringVar(
+            value=", ".join(str(roi[key]) for key in ("x1", "y1", "x2", "y2"))
+        )
 
         self.status_text = ctk.StringVar(value="")
         self.master = master
@@ -142,6 +174,82 @@ class SettingsPopUp(ctk.CTkToplevel):
         )
         default_offset.pack(pady=PADDING_SMALL, fill="x")
 
+        row = ctk.CTkFrame(container, fg_color="transparent")
+        row.pack(fill="x")
+        default_max_velocity = NamedEntry(
+            row,
+            input_var=self.default_max_velocity,
+            label="Default Max Velocity (°/s)",
+        )
+        default_max_velocity.pack(
+            side="left",
+            pady=PADDING_SMALL,
+            fill="x",
+            expand=True,
+            padx=(0, PADDING_SMALL),
+        )
+        default_max_acceleration = NamedEntry(
+            row,
+            input_var=self.default_max_acceleration,
+            label="Default Max Accel (°/s²)",
+        )
+        default_max_acceleration.pack(
+            side="left",
+            pady=PADDING_SMALL,
+            fill="x",
+            expand=True,
+            padx=(PADDING_SMALL, 0),
+        )
+
+        row = ctk.CTkFrame(container, fg_color="transparent")
+        row.pack(fill="x")
+        smooth_motion = NamedCheckbox(
+            row, input_var=self.smooth_motion, label="Smooth Motion"
+        )
+        smooth_motion.pack(side="left", pady=PADDING_SMALL, padx=(0, PADDING_SMALL))
+        control_rate = NamedEntry(
+            row, input_var=self.control_rate, label="Control Rate (Hz)"
+        )
+        control_rate.pack(
+            side="left",
+            pady=PADDING_SMALL,
+            fill="x",
+            expand=True,
+            padx=(PADDING_SMALL, 0),
+        )
+
+        row = ctk.CTkFrame(container, fg_color="transparent")
+        row.pack(fill="x")
+        ctk.CTkLabel(
+            row, text="Servo Backend", font=SMALL_FONT, text_color=TEXT_COLOUR
+        ).pack(side="left", anchor="w", padx=(0, PADDING_SMALL))
+        ctk.CTkOptionMenu(
+            row,
+            values=SERVO_BACKENDS,
+            variable=self.servo_backend,
+            height=24,
+        ).pack(side="left", pady=PADDING_SMALL, padx=PADDING_SMALL)
+        simulated_slew_rate = NamedEntry(
+            row, input_var=self.simulated_slew_rate, label="Sim Slew (°/s)"
+        )
+        simulated_slew_rate.pack(
+            side="left",
+            pady=PADDING_SMALL,
+            fill="x",
+            expand=True,
+            padx=PADDING_SMALL,
+        )
+        simulated_latency = NamedEntry(
+            row, input_var=self.simulated_latency, label="Sim Latency (s)"
+        )
+        simulated_latency.pack(
+            side="left",
+            pady=PADDING_SMALL,
+            fill="x",
+            expand=True,
+            padx=(PADDING_SMALL, 0),
+        )
+
         table_header = ctk.CTkFrame(container, fg_color="transparent")
         table_header.pack(fill="x", pady=(PADDING_SMALL, 0))
         for text, width in [
@@ -152,6 +260,8 @@ class SettingsPopUp(ctk.CTkToplevel):
             ("Max", 70),
             ("Deadband", 85),
             ("Interval", 90),
+            ("Vel", 70),
+            ("Accel", 70),
             ("Edit", 56),
         ]:
             ctk.CTkLabel(
@@ -199,6 +309,8 @@ class SettingsPopUp(ctk.CTkToplevel):
         max_var = ctk.DoubleVar(value=float(servo_cfg.max_angle))
         deadband_var = ctk.DoubleVar(value=float(servo_cfg.deadband_degrees))
         interval_var = ctk.DoubleVar(value=float(servo_cfg.command_interval_seconds))
+        velocity_var = ctk.DoubleVar(value=float(servo_cfg.max_velocity))
+        acceleration_var = ctk.DoubleVar(value=float(servo_cfg.max_acceleration))
 
         ctk.CTkOptionMenu(
             row,
@@ -225,6 +337,12 @@ class SettingsPopUp(ctk.CTkToplevel):
         ctk.CTkEntry(row, textvariable=interval_var, width=90, height=24).pack(
             side="left", padx=(0, 4)
         )
+        ctk.CTkEntry(row, textvariable=velocity_var, width=70, height=24).pack(
+            side="left", padx=(0, 4)
+        )
+        ctk.CTkEntry(row, textvariable=acceleration_var, width=70, height=24).pack(
+            side="left", padx=(0, 4)
+        )
 
         row_data: dict[str, object] = {
             "frame": row,
@@ -235,6 +353,8 @@ class SettingsPopUp(ctk.CTkToplevel):
             "max": max_var,
             "deadband": deadband_var,
             "interval": interval_var,
+            "velocity": velocity_var,
+            "acceleration": acceleration_var,
         }
 
         ctk.CTkButton(
@@ -295,6 +415,8 @@ class SettingsPopUp(ctk.CTkToplevel):
                         max_angle=float(row["max"].get()),
                         deadband_degrees=max(0.0, float(row["deadband"].get())),
                         command_interval_seconds=max(0.0, float(row["interval"].get())),
+                        max_velocity=max(0.0, float(row["velocity"].get())),
+                        max_acceleration=max(0.0, float(row["acceleration"].get())),
                         clamp_enabled=clamp_enabled,
                         clamp_min_angle=clamp_min,
                         clamp_max_angle=clamp_max,
@@ -328,7 +450,12 @@ class SettingsPopUp(ctk.CTkToplevel):
         use_webcam = NamedCheckbox(
             row_frame, input_var=self.use_webcam, label="Use Webcam"
         )
-        use_webcam.pack(side="left", pady=PADDING_SMALL, padx=(PADDING_SMALL, 0))
+        use_webcam.pack(side="left", pady=PADDING_SMALL, padx=PADDING_SMALL)
+
+        threaded_grab = NamedCheckbox(
+            row_frame, input_var=self.threaded_grab, label="Background Grab"
+        )
+        threaded_grab.pack(side="left", pady=PADDING_SMALL, padx=(PADDING_SMALL, 0))
 
         row_frame = ctk.CTkFrame(container, fg_color="transparent")
         row_frame.pack(fill="x")
@@ -356,6 +483,24 @@ class SettingsPopUp(ctk.CTkToplevel):
         )
         capture_fps.pack(pady=PADDING_SMALL, fill="x")
 
+        inference_fps = NamedSlider(
+            container,
+            label="Inference FPS",
+            input_var=self.inference_fps,
+            from_=1,
+            to=60,
+        )
+        inference_fps.pack(pady=PADDING_SMALL, fill="x")
+
+        display_fps = NamedSlider(
+            container,
+            label="Display FPS",
+            input_var=self.display_fps,
+            from_=1,
+            to=60,
+        )
+        display_fps.pack(pady=PADDING_SMALL, fill="x")
+
         ip_address = NamedEntry(
             container, input_var=self.ip_address, label="IP Address"
         )
@@ -385,9 +530,87 @@ class SettingsPopUp(ctk.CTkToplevel):
         yolo_path = NamedEntry(container, input_var=self.yolo_path, label="Model Path")
         yolo_path.pack(pady=PADDING_SMALL, fill="x")
 
+        row_frame = ctk.CTkFrame(container, fg_color="transparent")
+        row_frame.pack(fill="x")
+        ctk.CTkLabel(
+            row_frame, text="Inference Backend", font=SMALL_FONT, text_color=TEXT_COLOUR
+        ).pack(side="left", anchor="w", padx=PADDING_SMALL)
+        ctk.CTkOptionMenu(
+            row_frame,
+            values=INFERENCE_BACKENDS,
+            variable=self.yolo_backend,
+            height=24,
+        ).pack(side="left", pady=PADDING_SMALL, padx=PADDING_SMALL)
+        ctk.CTkLabel(
+            row_frame, text="Engine", font=SMALL_FONT, text_color=TEXT_COLOUR
+        ).pack(side="left", anchor="w", padx=PADDING_SMALL)
+        ctk.CTkOptionMenu(
+            row_frame,
+            values=YOLO_ENGINES,
+            variable=self.yolo_engine,
+            height=24,
+        ).pack(side="left", pady=PADDING_SMALL, padx=PADDING_SMALL)
+
+        row_frame = ctk.CTkFrame(container, fg_color="transparent")
+        row_frame.pack(fill="x")
+
+        yolo_imgsz = NamedEntry(
+            row_frame, input_var=self.yolo_imgsz, label="Inference Size"
+        )
+        yolo_imgsz.pack(
+            side="left", pady=PADDING_SMALL, fill="x", padx=(0, PADDING_SMALL)
+        )
+
+        yolo_min_imgsz = NamedEntry(
+            row_frame, input_var=self.yolo_min_imgsz, label="Idle Inference Size"
+        )
+        yolo_min_imgsz.pack(
+            side="left", pady=PADDING_SMALL, fill="x", padx=(PADDING_SMALL, 0)
+        )
+
+        row_frame = ctk.CTkFrame(container, fg_color="transparent")
+        row_frame.pack(fill="x")
+
+        adaptive_imgsz = NamedCheckbox(
+            row_frame, input_var=self.adaptive_imgsz, label="Adaptive Size"
+        )
+        adaptive_imgsz.pack(side="left", pady=PADDING_SMALL, padx=(0, PADDING_SMALL))
+
+        auto_roi = NamedCheckbox(row_frame, input_var=self.auto_roi, label="Auto ROI")
+        auto_roi.pack(side="left", pady=PADDING_SMALL, padx=PADDING_SMALL)
+
+        motion_gating = NamedCheckbox(
+            row_frame, input_var=self.motion_gating, label="Motion Gating"
+        )
+        motion_gating.pack(side="left", pady=PADDING_SMALL, padx=PADDING_SMALL)
+
+        tracking = NamedCheckbox(row_frame, input_var=self.tracking, label="Tracking")
+        tracking.pack(side="left", pady=PADDING_SMALL, padx=(PADDING_SMALL, 0))
+
+        yolo_roi = NamedEntry(
+            container, input_var=self.yolo_roi, label="ROI (x1, y1, x2, y2)"
+        )
+        yolo_roi.pack(pady=PADDING_SMALL, fill="x")
+
+    def collect_roi(self) -> dict[str, float]:
+        parts = [part.strip() for part in self.yolo_roi.get().split(",")]
+        if len(parts) != 4:
+            raise ValueError("ROI needs four values: x1, y1, x2, y2")
+        try:
+            x1, y1, x2, y2 = (max(0.0, min(float(part), 1.0)) for part in parts)
+        except ValueError as exc:
+            raise ValueError("ROI values must be fractions between 0 and 1") from exc
+        return {
+            "x1": min(x1, x2),
+            "y1": min(y1, y2),
+            "x2": max(x1, x2),
+            "y2": max(y1, y2),
+        }
+
     def save_settings(self):
         try:
             servo_entries = self.collect_table_rows()
+            roi = self.collect_roi()
         except ValueError as exc:
             self.status_text.set(f"Validation error: {exc}")
             return
@@ -402,7 +625,14 @@ class SettingsPopUp(ctk.CTkToplevel):
             max_angle=self.default_max_angle.get(),
             deadband_degrees=max(0.0, self.default_deadband.get()),
             command_interval_seconds=max(0.0, self.default_command_interval.get()),
-        )
+            max_velocity=max(0.0, self.default_max_velocity.get()),
+            max_acceleration=max(0.0, self.default_max_acceleration.get()),
+        )
+        config.servo_pins.smooth_motion = self.smooth_motion.get()
+        config.servo_pins.control_rate = max(1.0, min(500.0, self.control_rate.get()))
+        config.servo_pins.backend = self.servo_backend.get()
+        config.servo_pins.simulated_slew_rate = max(0.0, self.simulated_slew_rate.get())
+        config.servo_pins.simulated_latency = max(0.0, self.simulated_latency.get())
         config.servo_pins.servos = servo_entries
 
         config.capture.enabled = self.capture_enabled.get()
@@ -410,11 +640,23 @@ class SettingsPopUp(ctk.CTkToplevel):
         config.capture.resolution["x"] = max(160, self.resolution_x.get())
         config.capture.resolution["y"] = max(120, self.resolution_y.get())
         config.capture.capture_fps = max(1, min(120, int(self.capture_fps.get())))
+        config.capture.inference_fps = max(1, min(60, int(self.inference_fps.get())))
+        config.capture.display_fps = max(1, min(60, int(self.display_fps.get())))
         config.capture.use_webcam = self.use_webcam.get()
+        config.capture.threaded_grab = self.threaded_grab.get()
 
         config.yolo.enabled = self.yolo_enabled.get()
         config.yolo.min_confidence = min(1.0, max(0.0, self.min_confidence.get()))
         config.yolo.path = self.yolo_path.get().strip()
+        config.yolo.backend = self.yolo_backend.get()
+        config.yolo.engine = self.yolo_engine.get()
+        config.yolo.imgsz = max(32, int(self.yolo_imgsz.get()) // 32 * 32)
+        config.yolo.min_imgsz = max(32, int(self.yolo_min_imgsz.get()) // 32 * 32)
+        config.yolo.adaptive_imgsz = self.adaptive_imgsz.get()
+        config.yolo.auto_roi = self.auto_roi.get()
+        config.yolo.motion_gating = self.motion_gating.get()
+        config.yolo.tracking = self.tracking.get()
+        config.yolo.roi = roi
 
         self.master.apply_runtime_config(config)
         config.save_to_file(CONFIG_PATH)
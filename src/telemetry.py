@@ -0,0 +1,106 @@
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+TELEMETRY_INTERVAL = 5.0
+THERMAL_ZONE_PATH = Path("/sys/class/thermal/thermal_zone0/temp")
+THROTTLED_PATH = Path("/sys/devices/platform/soc/soc:firmware/get_throttled")
+THROTTLED_ACTIVE_MASK = 0xF
+
+
+@dataclass
+class HostVitals:
+    battery_percent: float | None = None
+    cpu_temperature: float | None = None
+    throttled: bool | None = None
+    sampled_at: float = 0.0
+
+    def battery_text(self) -> str:
+        if self.battery_percent is None:
+            return "N/A"
+        return f"{int(self.battery_percent)}%"
+
+    def host_text(self) -> str:
+        if self.cpu_temperature is None and self.throttled is None:
+            return "N/A"
+        parts: list[str] = []
+        if self.cpu_temperature is not None:
+            parts.append(f"{self.cpu_temperature:.0f}°C")
+        if self.throttled:
+            parts.append("throttled")
+        return ", ".join(parts) or "OK"
+
+
+class TelemetrySampler:
+    def __init__(self, interval: float = TELEMETRY_INTERVAL):
+        self.interval = interval
+        self.latest = HostVitals()
+        self._psutil = None
+        self._vcgencmd = shutil.which("vcgencmd")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def run(self):
+        try:
+            import psutil
+
+            self._psutil = psutil
+        except Exception:
+            self._psutil = None
+
+        while not self._stop.is_set():
+            self.latest = self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self) -> HostVitals:
+        return HostVitals(
+            battery_percent=self.read_battery(),
+            cpu_temperature=self.read_cpu_temperature(),
+            throttled=self.read_throttled(),
+            sampled_at=time.monotonic(),
+        )
+
+    def read_battery(self) -> float | None:
+        if self._psutil is None:
+            return None
+        try:
+            battery = self._psutil.sensors_battery()
+        except Exception:
+            return None
+        if battery is None or battery.percent is None:
+            return None
+        return float(battery.percent)
+
+    def read_cpu_temperature(self) -> float | None:
+        try:
+            return int(THERMAL_ZONE_PATH.read_text().strip()) / 1000
+        except (OSError, ValueError):
+            return None
+
+    def read_throttled(self) -> bool | None:
+        try:
+            return (
+                int(THROTTLED_PATH.read_text().strip(), 16) & THROTTLED_ACTIVE_MASK != 0
+            )
+        except (OSError, ValueError):
+            pass
+        if self._vcgencmd is None:
+            return None
+        try:
+            output = subprocess.run(
+                [self._vcgencmd, "get_throttled"],
+                capture_output=True,
+                text=True,
+                timeout=1.0,
+            ).stdout
+            return int(output.strip().split("=", 1)[1], 16) & THROTTLED_ACTIVE_MASK != 0
+        except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+            self._vcgencmd = None
+            return None
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,226 @@
+from dataclasses import replace
+import numpy as np
+from controllers import DETECTION_DTYPE, DetectionResult
+
+TRACK_IOU_THRESHOLD = 0.3
+TRACK_MAX_MISSED = 5
+TRACK_COAST_MISSED = 2
+TRACK_MIN_HITS = 2
+TRACK_DTYPE = np.dtype(
+    [
+        ("track_id", np.int32),
+        ("class_id", np.int32),
+        ("cx", np.float32),
+        ("cy", np.float32),
+        ("w", np.float32),
+        ("h", np.float32),
+        ("vx", np.float32),
+        ("vy", np.float32),
+        ("confidence", np.float32),
+        ("timestamp", np.float64),
+        ("missed", np.int32),
+        ("hits", np.int32),
+    ]
+)
+
+
+def box_iou(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    x1 = np.maximum(first[:, None, 0], second[None, :, 0])
+    y1 = np.maximum(first[:, None, 1], second[None, :, 1])
+    x2 = np.minimum(first[:, None, 2], second[None, :, 2])
+    y2 = np.minimum(first[:, None, 3], second[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    first_area = (first[:, 2] - first[:, 0]) * (first[:, 3] - first[:, 1])
+    second_area = (second[:, 2] - second[:, 0]) * (second[:, 3] - second[:, 1])
+    union = first_area[:, None] + second_area[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+
+class Tracker:
+    def __init__(
+        self,
+        *,
+        iou_threshold: float = TRACK_IOU_THRESHOLD,
+        max_missed: int = TRACK_MAX_MISSED,
+        coast_missed: int = TRACK_COAST_MISSED,
+        min_hits: int = TRACK_MIN_HITS,
+        position_gain: float = 0.6,
+        velocity_gain: float = 0.2,
+        confidence_smoothing: float = 0.4,
+        missed_decay: float = 0.8,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.coast_missed = coast_missed
+        self.min_hits = min_hits
+        self.position_gain = position_gain
+        self.velocity_gain = velocity_gain
+        self.confidence_smoothing = confidence_smoothing
+        self.missed_decay = missed_decay
+        self._tracks = np.empty(0, dtype=TRACK_DTYPE)
+        self._next_id = 1
+
+    def reset(self):
+        self._tracks = np.empty(0, dtype=TRACK_DTYPE)
+
+    @property
+    def track_count(self) -> int:
+        return len(self._tracks)
+
+    @staticmethod
+    def predicted_boxes(tracks: np.ndarray, timestamp: float) -> np.ndarray:
+        elapsed = np.maximum(timestamp - tracks["timestamp"], 0.0)
+        cx = tracks["cx"] + tracks["vx"] * elapsed
+        cy = tracks["cy"] + tracks["vy"] * elapsed
+        half_w = tracks["w"] / 2
+        half_h = tracks["h"] / 2
+        return np.stack(
+            [cx - half_w, cy - half_h, cx + half_w, cy + half_h], axis=1
+        ).astype(np.float32)
+
+    def match(
+        self, predicted: np.ndarray, measured: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if len(predicted) == 0 or len(measured) == 0:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+
+        iou = box_iou(predicted, measured)
+        predicted_centres = (predicted[:, :2] + predicted[:, 2:]) / 2
+        measured_centres = (measured[:, :2] + measured[:, 2:]) / 2
+        distance = np.linalg.norm(
+            predicted_centres[:, None, :] - measured_centres[None, :, :], axis=2
+        )
+        extent = np.maximum(predicted[:, 2:] - predicted[:, :2], 1.0).max(axis=1)
+        distance /= extent[:, None]
+
+        # IoU matches always outrank centroid-only matches.
+        score = np.where(
+            iou >= self.iou_threshold,
+            1.0 + iou,
+            np.where(distance < 1.0, 1.0 - distance, 0.0),
+        )
+
+        track_indices: list[int] = []
+        detection_indices: list[int] = []
+        used_tracks: set[int] = set()
+        used_detections: set[int] = set()
+        for flat in np.argsort(-score, axis=None):
+            track_index, detection_index = divmod(int(flat), score.shape[1])
+            if score[track_index, detection_index] <= 0:
+                break
+            if track_index in used_tracks or detection_index in used_detections:
+                continue
+            used_tracks.add(track_index)
+            used_detections.add(detection_index)
+            track_indices.append(track_index)
+            detection_indices.append(detection_index)
+        return (
+            np.asarray(track_indices, dtype=np.intp),
+            np.asarray(detection_indices, dtype=np.intp),
+        )
+
+    def update(self, detection: DetectionResult) -> DetectionResult:
+        if not detection.active:
+            self.reset()
+            return detection
+
+        timestamp = detection.timestamp
+        tracks = self._tracks.copy()
+        boxes = detection.box_array
+        measured = np.stack(
+            [boxes["x1"], boxes["y1"], boxes["x2"], boxes["y2"]], axis=1
+        ).astype(np.float32)
+        track_indices, detection_indices = self.match(
+            self.predicted_boxes(tracks, timestamp), measured
+        )
+
+        if len(track_indices):
+            matched = tracks[track_indices]
+            found = measured[detection_indices]
+            elapsed = np.maximum(timestamp - matched["timestamp"], 1e-3)
+            for centre, velocity, low, high in (
+                ("cx", "vx", 0, 2),
+                ("cy", "vy", 1, 3),
+            ):
+                predicted = matched[centre] + matched[velocity] * elapsed
+                residual = (found[:, low] + found[:, high]) / 2 - predicted
+                matched[centre] = predicted + self.position_gain * residual
+                matched[velocity] += self.velocity_gain * residual / elapsed
+            for size, low, high in (("w", 0, 2), ("h", 1, 3)):
+                measured_size = found[:, high] - found[:, low]
+                matched[size] += self.position_gain * (measured_size - matched[size])
+            matched["confidence"] += self.confidence_smoothing * (
+                boxes["confidence"][detection_indices] - matched["confidence"]
+            )
+            matched["class_id"] = boxes["class_id"][detection_indices]
+            matched["timestamp"] = timestamp
+            matched["missed"] = 0
+            matched["hits"] += 1
+            tracks[track_indices] = matched
+
+        unmatched = np.ones(len(tracks), dtype=bool)
+        unmatched[track_indices] = False
+        tracks["missed"][unmatched] += 1
+        tracks["confidence"][unmatched] *= self.missed_decay
+        tracks = tracks[tracks["missed"] <= self.max_missed]
+
+        new = np.ones(len(measured), dtype=bool)
+        new[detection_indices] = False
+        if new.any():
+            found = measured[new]
+            spawned = np.zeros(int(new.sum()), dtype=TRACK_DTYPE)
+            spawned["track_id"] = np.arange(
+                self._next_id, self._next_id + len(spawned), dtype=np.int32
+            )
+            self._next_id += len(spawned)
+            spawned["class_id"] = boxes["class_id"][new]
+            spawned["cx"] = (found[:, 0] + found[:, 2]) / 2
+            spawned["cy"] = (found[:, 1] + found[:, 3]) / 2
+            spawned["w"] = found[:, 2] - found[:, 0]
+            spawned["h"] = found[:, 3] - found[:, 1]
+            spawned["confidence"] = boxes["confidence"][new]
+            spawned["timestamp"] = timestamp
+            spawned["hits"] = 1
+            tracks = np.concatenate([tracks, spawned])
+
+        self._tracks = tracks
+        return self.as_result(tracks, timestamp, detection)
+
+    def predict(self, timestamp: float, detection: DetectionResult) -> DetectionResult:
+        if not detection.active:
+            return detection
+        return self.as_result(self._tracks, timestamp, detection)
+
+    def as_result(
+        self, tracks: np.ndarray, timestamp: float, detection: DetectionResult
+    ) -> DetectionResult:
+        # Confirmed tracks coast through a few missed inferences; older or
+        # unconfirmed ones are only kept so a returning object keeps its ID.
+        coasting = (tracks["missed"] <= self.coast_missed) & (
+            tracks["hits"] >= self.min_hits
+        )
+        tracks = tracks[(tracks["missed"] == 0) | coasting]
+        if len(tracks) == 0:
+            return replace(
+                detection,
+                severity=0.0,
+                box_array=np.empty(0, dtype=DETECTION_DTYPE),
+                reason="No detections",
+            )
+
+        predicted = self.predicted_boxes(tracks, timestamp)
+        box_array = np.empty(len(tracks), dtype=DETECTION_DTYPE)
+        box_array["x1"] = predicted[:, 0]
+        box_array["y1"] = predicted[:, 1]
+        box_array["x2"] = predicted[:, 2]
+        box_array["y2"] = predicted[:, 3]
+        box_array["confidence"] = tracks["confidence"]
+        box_array["class_id"] = tracks["class_id"]
+        box_array["track_id"] = tracks["track_id"]
+        return replace(
+            detection,
+            severity=float(tracks["confidence"].mean()),
+            box_array=box_array,
+            reason="Detections available",
+        )